@@ -0,0 +1,104 @@
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+# ────────────────────────────────────────────────
+# Content-addressed response cache (SQLite)
+# Key = sha256(model, prompt, temperature, max_tokens, seed[, system prefix]).
+# Modes:
+#   off           - never touched
+#   read-through  - serve hits, call + store on miss
+#   write-only    - always call, store the fresh result
+#   replay-only   - serve hits, raise CacheMissError on miss (no network)
+# ────────────────────────────────────────────────
+
+CACHE_MODES = ("off", "read-through", "write-only", "replay-only")
+
+
+class CacheMissError(RuntimeError):
+    """Replay-only cache had no entry for the request"""
+
+
+def cache_key(model: str, prompt: str, temperature: float, max_tokens: int, seed: Optional[int] = None,
+              system: Optional[str] = None) -> str:
+    fields = [model, prompt, temperature, max_tokens, seed]
+    if system is not None:
+        fields.append(system)  # classic-layout keys stay unchanged
+    material = json.dumps(fields, ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """One connection + hit/miss counters per debate; the file is shared"""
+
+    def __init__(self, path: Path, mode: str = "read-through", max_bytes: int = 256 * 1024 * 1024):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode '{mode}' (expected one of {', '.join(CACHE_MODES)})")
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.stats = {"mode": mode, "hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), timeout=30.0)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses(last_used)")
+        self.db.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.mode in ("off", "write-only"):
+            return None
+        row = self.db.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.stats["misses"] += 1
+            if self.mode == "replay-only":
+                raise CacheMissError(f"No cached response for key {key[:12]}… (replay-only mode)")
+            return None
+        self.stats["hits"] += 1
+        self.db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        self.db.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, model: str, result: Dict[str, Any]):
+        if self.mode in ("off", "replay-only"):
+            return
+        # Hedge outcomes describe one live race, not the response - never replayed
+        record = {k: v for k, v in result.items() if k not in ("type", "cached", "hedge")}
+        blob = json.dumps(record, ensure_ascii=False)
+        now = time.time()
+        self.db.execute(
+            "INSERT OR REPLACE INTO responses (key, model, response, size, created, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, model, blob, len(blob.encode("utf-8")), now, now)
+        )
+        self.stats["writes"] += 1
+        self._evict()
+        self.db.commit()
+
+    def _evict(self):
+        """Drop least-recently-used entries until the store fits in max_bytes"""
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.db.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+            self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.stats["evictions"] += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def close(self):
+        self.db.close()
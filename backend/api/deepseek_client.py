@@ -1,83 +1,154 @@
-import httpx
-import os
+import logging
 import time
-from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Optional
 import asyncio
 
-# Manual .env loading - reliable fallback
-env_path = Path(__file__).parent.parent.parent / ".env"
-if env_path.exists():
-    with open(env_path, "r") as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#') and '=' in line:
-                key, value = line.split('=', 1)
-                os.environ[key.strip()] = value.strip()
-else:
-    raise FileNotFoundError(f".env not found at {env_path}")
+from .session import get_session
+from .streaming import stream_chat_completion
+from .ratelimit import get_limiter, estimate_request_tokens, is_retryable
+from .env import require_key, env_setting
+from .timing import current_timer
+from .usage import parse_usage, build_messages
 
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-if not OPENROUTER_API_KEY:
-    raise ValueError("OPENROUTER_API_KEY not found in .env")
+logger = logging.getLogger(__name__)
 
 OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 
+def _headers() -> Dict[str, str]:
+    return {
+        "Authorization": f"Bearer {require_key('OPENROUTER_API_KEY')}",
+        "Content-Type": "application/json",
+        "HTTP-Referer": "https://mirror-max.local",
+        "X-Title": "Mirror Max Debate"
+    }
+
 async def deepseek_generate(
     prompt: str,
     model: str = "deepseek/deepseek-r1",  # Stable & available model on OpenRouter (Jan 2026)
     max_tokens: int = 1024,
     temperature: float = 0.7,
     timeout: float = 60.0,          # Shorter per attempt
-    max_retries: int = 3
+    max_retries: int = 3,
+    base_url: Optional[str] = None,  # default: $OPENROUTER_BASE_URL or the public endpoint
+    system: Optional[str] = None     # invariant prefix, sent as a leading system message
 ) -> Dict[str, Any]:
     """
-    Call DeepSeek via OpenRouter with retry on timeout/hang
+    Call DeepSeek via OpenRouter through the shared rate limiter.
+    Retries timeouts, 429 and 5xx with exponential backoff + jitter (honors Retry-After).
     """
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        for attempt in range(1, max_retries + 1):
-            start_time = time.time()
+    client = get_session(base_url or env_setting("OPENROUTER_BASE_URL", OPENROUTER_BASE_URL))
+    limiter = get_limiter("openrouter", model)
+    estimated = estimate_request_tokens((system or "") + prompt, max_tokens)
+    timer = current_timer()
+    
+    payload = {
+        "model": model,
+        "messages": build_messages(prompt, system),
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "usage": {"include": True}  # OpenRouter: detailed usage incl. cached prompt tokens
+    }
+    
+    start_time = time.time()  # latency spans every attempt, backoff included
+    for attempt in range(1, max_retries + 1):
+        with timer.span("rate_limit_wait"):
+            await limiter.acquire(estimated)
+        timer.attempts += 1
+        
+        try:
+            logger.debug("Attempt %d/%d (%s)", attempt, max_retries, model)
+            response = await client.post(
+                "/chat/completions",
+                json=payload,
+                headers=_headers(),
+                timeout=timeout,
+                extensions={"trace": timer.trace_hook()}
+            )
+            limiter.update_from_headers(response.headers)
+            response.raise_for_status()
+            with timer.span("json_decode"):
+                data = response.json()
             
-            headers = {
-                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "https://mirror-max.local",
-                "X-Title": "Mirror Max Debate"
-            }
+            content = data["choices"][0]["message"]["content"]
+            usage = parse_usage(data.get("usage"))
+            limiter.settle(estimated, usage["total_tokens"])
+            
+            latency_ms = (time.time() - start_time) * 1000
             
-            payload = {
-                "model": model,
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": temperature,
-                "max_tokens": max_tokens
+            return {
+                "content": content,
+                "tokens_used": usage["total_tokens"],
+                "usage": usage,
+                "latency_ms": latency_ms
             }
             
-            try:
-                print(f"Attempt {attempt}/{max_retries}...")
-                response = await client.post(
-                    f"{OPENROUTER_BASE_URL}/chat/completions",
-                    json=payload,
-                    headers=headers
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                content = data["choices"][0]["message"]["content"]
-                tokens_used = data.get("usage", {}).get("total_tokens", 0)
-                
-                latency_ms = (time.time() - start_time) * 1000
-                
-                return {
-                    "content": content,
-                    "tokens_used": tokens_used,
-                    "latency_ms": latency_ms
-                }
-                
-            except (httpx.TimeoutException, httpx.ConnectError, httpx.ReadTimeout) as e:
-                print(f"Timeout/connect error on attempt {attempt}: {str(e)}")
-                if attempt == max_retries:
-                    raise RuntimeError(f"Max retries exceeded - network/server issue: {str(e)}")
-                await asyncio.sleep(5)  # Exponential backoff
-            except Exception as e:
+        except Exception as e:
+            if not is_retryable(e):
+                raise RuntimeError(f"OpenRouter error: {str(e)}\n"
+                                  f"Try alternative model: deepseek/deepseek-v3")
+            if attempt == max_retries:
+                raise RuntimeError(f"Max retries exceeded - network/server issue: {str(e)}")
+            delay = limiter.penalize(e, attempt)
+            logger.info("Retryable error on attempt %d: %s - backing off %.1fs", attempt, e, delay)
+            timer.retries += 1
+            with timer.span("retry_backoff"):
+                await asyncio.sleep(delay)
+
+
+async def deepseek_stream(
+    prompt: str,
+    model: str = "deepseek/deepseek-r1",
+    max_tokens: int = 1024,
+    temperature: float = 0.7,
+    timeout: float = 60.0,
+    max_retries: int = 3,
+    base_url: Optional[str] = None,  # default: $OPENROUTER_BASE_URL or the public endpoint
+    system: Optional[str] = None     # invariant prefix, sent as a leading system message
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of deepseek_generate.
+    Yields {'type': 'delta', 'content': str} events, then a final 'done' event with
+    content, tokens_used, usage, latency_ms, ttft_ms and tokens_per_sec.
+    Retries only if the request fails before any text has arrived.
+    """
+    client = get_session(base_url or env_setting("OPENROUTER_BASE_URL", OPENROUTER_BASE_URL))
+    limiter = get_limiter("openrouter", model)
+    estimated = estimate_request_tokens((system or "") + prompt, max_tokens)
+    timer = current_timer()
+    
+    payload = {
+        "model": model,
+        "messages": build_messages(prompt, system),
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "usage": {"include": True}  # OpenRouter: detailed usage incl. cached prompt tokens
+    }
+    
+    start_time = time.time()  # latency spans every attempt, backoff included
+    for attempt in range(1, max_retries + 1):
+        with timer.span("rate_limit_wait"):
+            await limiter.acquire(estimated)
+        timer.attempts += 1
+        received = False
+        try:
+            async for event in stream_chat_completion(client, payload, _headers(), timeout,
+                                                      on_headers=limiter.update_from_headers):
+                if event["type"] == "done":
+                    event["usage"] = parse_usage(event["usage"])
+                    event["tokens_used"] = event["usage"]["total_tokens"]
+                    limiter.settle(estimated, event["tokens_used"])
+                    event["latency_ms"] = (time.time() - start_time) * 1000
+                received = received or event["type"] != "activity"  # no text yet: still retryable
+                yield event
+            return
+        except Exception as e:
+            if not is_retryable(e):
                 raise RuntimeError(f"OpenRouter error: {str(e)}\n"
                                   f"Try alternative model: deepseek/deepseek-v3")
+            if received or attempt == max_retries:
+                raise RuntimeError(f"Max retries exceeded - network/server issue: {str(e)}")
+            delay = limiter.penalize(e, attempt)
+            logger.info("Retryable error on attempt %d: %s - backing off %.1fs", attempt, e, delay)
+            timer.retries += 1
+            with timer.span("retry_backoff"):
+                await asyncio.sleep(delay)
@@ -0,0 +1,42 @@
+import os
+from pathlib import Path
+from typing import Optional
+
+# ────────────────────────────────────────────────
+# .env loading - parsed once per process, on first key lookup.
+# A missing .env is fine when keys come from the real environment.
+# ────────────────────────────────────────────────
+
+ENV_PATH = Path(__file__).parent.parent.parent / ".env"
+
+_loaded = False
+
+
+def load_env(path: Optional[Path] = None) -> None:
+    global _loaded
+    if _loaded:
+        return
+    env_path = Path(path) if path else ENV_PATH
+    if env_path.exists():
+        with open(env_path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#') and '=' in line:
+                    key, value = line.split('=', 1)
+                    os.environ[key.strip()] = value.strip()
+    _loaded = True
+
+
+def require_key(name: str) -> str:
+    """Return an API key from the environment / .env, or raise with a helpful message"""
+    load_env()
+    value = os.getenv(name)
+    if not value:
+        raise ValueError(f"{name} not found - set it in the environment or in {ENV_PATH}")
+    return value
+
+
+def env_setting(name: str, default: str) -> str:
+    """Optional setting from the environment / .env (e.g. a base-URL override)"""
+    load_env()
+    return os.getenv(name) or default
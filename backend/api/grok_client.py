@@ -1,76 +1,143 @@
-import httpx
-import os
+import logging
 import time
-from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Optional
+import asyncio
 
-# ────────────────────────────────────────────────
-# Manual .env loading (reliable fallback)
-# ────────────────────────────────────────────────
-env_path = Path(__file__).parent.parent.parent / ".env"
-if env_path.exists():
-    with open(env_path, "r") as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#') and '=' in line:
-                key, value = line.split('=', 1)
-                os.environ[key.strip()] = value.strip()
-else:
-    raise FileNotFoundError(f".env not found at {env_path}")
+from .session import get_session
+from .streaming import stream_chat_completion
+from .ratelimit import get_limiter, estimate_request_tokens, is_retryable
+from .env import require_key, env_setting
+from .timing import current_timer
+from .usage import parse_usage, build_messages
 
-GROK_API_KEY = os.getenv("GROK_API_KEY")
-if not GROK_API_KEY:
-    raise ValueError("GROK_API_KEY not found after manual parsing")
+logger = logging.getLogger(__name__)
 
 GROK_BASE_URL = "https://api.x.ai/v1"
 
+def _headers() -> Dict[str, str]:
+    return {
+        "Authorization": f"Bearer {require_key('GROK_API_KEY')}",
+        "Content-Type": "application/json"
+    }
+
 async def grok_generate(
     prompt: str,
     model: str = "grok-beta",  # Change to current model name if needed
     max_tokens: int = 1024,
     temperature: float = 0.7,
-    timeout: float = 90.0
+    timeout: float = 90.0,
+    max_retries: int = 3,
+    base_url: Optional[str] = None,  # default: $GROK_BASE_URL or the public endpoint
+    system: Optional[str] = None     # invariant prefix, sent as a leading system message
 ) -> Dict[str, Any]:
     """
-    Call Grok / xAI API (OpenAI-compatible format)
-    Returns {'content': str, 'tokens_used': int, 'latency_ms': float}
+    Call Grok / xAI API (OpenAI-compatible format) through the shared rate limiter
+    Returns {'content': str, 'tokens_used': int, 'usage': dict, 'latency_ms': float}
     """
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        start_time = time.time()
-        
-        headers = {
-            "Authorization": f"Bearer {GROK_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "model": model,
-            "messages": [{"role": "user", "content": prompt}],
-            "temperature": temperature,
-            "max_tokens": max_tokens,
-            "stream": False
-        }
+    client = get_session(base_url or env_setting("GROK_BASE_URL", GROK_BASE_URL))
+    limiter = get_limiter("xai", model)
+    estimated = estimate_request_tokens((system or "") + prompt, max_tokens)
+    timer = current_timer()
+    
+    payload = {
+        "model": model,
+        "messages": build_messages(prompt, system),
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "stream": False
+    }
+    
+    start_time = time.time()  # latency spans every attempt, backoff included
+    for attempt in range(1, max_retries + 1):
+        with timer.span("rate_limit_wait"):
+            await limiter.acquire(estimated)
+        timer.attempts += 1
         
         try:
             response = await client.post(
-                f"{GROK_BASE_URL}/chat/completions",
+                "/chat/completions",
                 json=payload,
-                headers=headers
+                headers=_headers(),
+                timeout=timeout,
+                extensions={"trace": timer.trace_hook()}
             )
+            limiter.update_from_headers(response.headers)
             response.raise_for_status()
-            data = response.json()
+            with timer.span("json_decode"):
+                data = response.json()
             
             content = data["choices"][0]["message"]["content"]
-            tokens_used = data.get("usage", {}).get("completion_tokens", 0) + \
-                         data.get("usage", {}).get("prompt_tokens", 0)
+            usage = parse_usage(data.get("usage"))
+            limiter.settle(estimated, usage["total_tokens"])
             
             latency_ms = (time.time() - start_time) * 1000
             
             return {
                 "content": content,
-                "tokens_used": tokens_used,
+                "tokens_used": usage["total_tokens"],
+                "usage": usage,
                 "latency_ms": latency_ms
             }
             
         except Exception as e:
-            raise RuntimeError(f"Grok API error: {str(e)}")
+            if not is_retryable(e) or attempt == max_retries:
+                raise RuntimeError(f"Grok API error: {str(e)}")
+            delay = limiter.penalize(e, attempt)
+            logger.info("Grok retryable error on attempt %d: %s - backing off %.1fs", attempt, e, delay)
+            timer.retries += 1
+            with timer.span("retry_backoff"):
+                await asyncio.sleep(delay)
+
+
+async def grok_stream(
+    prompt: str,
+    model: str = "grok-beta",
+    max_tokens: int = 1024,
+    temperature: float = 0.7,
+    timeout: float = 90.0,
+    max_retries: int = 3,
+    base_url: Optional[str] = None,  # default: $GROK_BASE_URL or the public endpoint
+    system: Optional[str] = None     # invariant prefix, sent as a leading system message
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of grok_generate.
+    Yields {'type': 'delta', 'content': str} events, then a final 'done' event with
+    content, tokens_used, usage, latency_ms, ttft_ms and tokens_per_sec.
+    """
+    client = get_session(base_url or env_setting("GROK_BASE_URL", GROK_BASE_URL))
+    limiter = get_limiter("xai", model)
+    estimated = estimate_request_tokens((system or "") + prompt, max_tokens)
+    timer = current_timer()
+    
+    payload = {
+        "model": model,
+        "messages": build_messages(prompt, system),
+        "temperature": temperature,
+        "max_tokens": max_tokens
+    }
+    
+    start_time = time.time()  # latency spans every attempt, backoff included
+    for attempt in range(1, max_retries + 1):
+        with timer.span("rate_limit_wait"):
+            await limiter.acquire(estimated)
+        timer.attempts += 1
+        received = False
+        try:
+            async for event in stream_chat_completion(client, payload, _headers(), timeout,
+                                                      on_headers=limiter.update_from_headers):
+                if event["type"] == "done":
+                    event["usage"] = parse_usage(event["usage"])
+                    event["tokens_used"] = event["usage"]["total_tokens"]
+                    limiter.settle(estimated, event["tokens_used"])
+                    event["latency_ms"] = (time.time() - start_time) * 1000
+                received = received or event["type"] != "activity"  # no text yet: still retryable
+                yield event
+            return
+        except Exception as e:
+            if received or not is_retryable(e) or attempt == max_retries:
+                raise RuntimeError(f"Grok API error: {str(e)}")
+            delay = limiter.penalize(e, attempt)
+            logger.info("Grok retryable error on attempt %d: %s - backing off %.1fs", attempt, e, delay)
+            timer.retries += 1
+            with timer.span("retry_backoff"):
+                await asyncio.sleep(delay)
@@ -0,0 +1,36 @@
+import importlib
+from typing import Callable, Dict
+
+# ────────────────────────────────────────────────
+# Provider registry - client modules are imported on first use, so a
+# disabled participant never pays for (or fails on) its provider import.
+# ────────────────────────────────────────────────
+
+PROVIDERS = {
+    "deepseek": {
+        "module": "api.deepseek_client",
+        "generator": "deepseek_generate",
+        "streamer": "deepseek_stream",
+    },
+    "grok": {
+        "module": "api.grok_client",
+        "generator": "grok_generate",
+        "streamer": "grok_stream",
+    },
+}
+
+_loaded: Dict[str, Dict[str, Callable]] = {}
+
+
+def get_provider(name: str) -> Dict[str, Callable]:
+    """{'generator': fn, 'streamer': fn} for a provider name, importing its module lazily"""
+    if name not in _loaded:
+        if name not in PROVIDERS:
+            raise ValueError(f"Unknown provider '{name}' (known: {', '.join(PROVIDERS)})")
+        spec = PROVIDERS[name]
+        module = importlib.import_module(spec["module"])
+        _loaded[name] = {
+            "generator": getattr(module, spec["generator"]),
+            "streamer": getattr(module, spec["streamer"], None),
+        }
+    return _loaded[name]
@@ -0,0 +1,209 @@
+import asyncio
+import random
+import re
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+# ────────────────────────────────────────────────
+# Shared rate limiting per (provider, model)
+# Requests/min + tokens/min token buckets, FIFO-fair across every debate on
+# the loop, plus Retry-After / x-ratelimit-* aware backoff.
+# ────────────────────────────────────────────────
+
+RATE_LIMITS = {
+    "openrouter": {"rpm": 20, "tpm": 60000},
+    "xai": {"rpm": 60, "tpm": 100000},
+}
+
+BACKOFF = {
+    "base": 1.0,       # seconds
+    "max": 60.0,
+}
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Continuous-refill bucket: `capacity` units, refilled at capacity/60 per second"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        self._refill()
+        # Requests larger than the bucket only wait for a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+    def give(self, amount: float):
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """Limiter for one (provider, model) key; callers are served in arrival order"""
+
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()  # asyncio.Lock wakes waiters FIFO
+
+    async def acquire(self, estimated_tokens: int = 0) -> float:
+        """Wait for a request slot and token budget. Returns seconds spent waiting."""
+        start = time.monotonic()
+        async with self._lock:
+            while True:
+                delay = max(
+                    self.blocked_until - time.monotonic(),
+                    self.requests.wait_time(1),
+                    self.tokens.wait_time(estimated_tokens)
+                )
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+            self.requests.take(1)
+            self.tokens.take(estimated_tokens)
+        return time.monotonic() - start
+
+    def settle(self, estimated_tokens: int, actual_tokens: int):
+        """Correct the token bucket once real usage is known"""
+        if actual_tokens:
+            self.tokens.give(estimated_tokens - actual_tokens)
+
+    def block_for(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def penalize(self, error: Exception, attempt: int) -> float:
+        """Record a retryable failure; returns how long this caller should back off"""
+        server_delay = retry_after(error)
+        if isinstance(error, httpx.HTTPStatusError):
+            self.update_from_headers(error.response.headers)
+            if server_delay is not None:
+                self.block_for(server_delay)
+        return backoff_delay(attempt, server_delay)
+
+    def update_from_headers(self, headers: httpx.Headers):
+        """Pause the whole key if the provider says a window is exhausted"""
+        for remaining_key, reset_key in (
+            ("x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+            ("x-ratelimit-remaining-tokens", "x-ratelimit-reset-tokens"),
+            ("x-ratelimit-remaining", "x-ratelimit-reset"),  # OpenRouter style
+        ):
+            remaining = headers.get(remaining_key)
+            reset = parse_reset(headers.get(reset_key))
+            if remaining is not None and reset is not None:
+                try:
+                    if float(remaining) <= 0:
+                        self.block_for(reset)
+                except ValueError:
+                    pass
+
+
+# Keyed by (event loop id, provider, model) - asyncio.Lock is bound to one loop
+_limiters: Dict[Tuple[int, str, str], RateLimiter] = {}
+
+
+def configure_rate_limits(provider: str, rpm: Optional[float] = None, tpm: Optional[float] = None):
+    """Set rpm/tpm for a provider. Only affects limiters created afterwards."""
+    limits = RATE_LIMITS.setdefault(provider, {"rpm": 60, "tpm": 100000})
+    if rpm is not None:
+        limits["rpm"] = rpm
+    if tpm is not None:
+        limits["tpm"] = tpm
+
+
+def get_limiter(provider: str, model: str) -> RateLimiter:
+    key = (id(asyncio.get_running_loop()), provider, model)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        limits = RATE_LIMITS.get(provider, {"rpm": 60, "tpm": 100000})
+        limiter = _limiters[key] = RateLimiter(limits["rpm"], limits["tpm"])
+    return limiter
+
+
+def drop_limiters(loop_id: int) -> None:
+    """Forget the limiters of a finished loop (see api/session.close_sessions)"""
+    for key in [k for k in _limiters if k[0] == loop_id]:
+        del _limiters[key]
+
+
+def estimate_request_tokens(prompt: str, max_tokens: int) -> int:
+    """Rough budget charge before the call: ~4 chars per prompt token + full completion"""
+    return len(prompt) // 4 + max_tokens
+
+
+# ────────────────────────────────────────────────
+# Backoff helpers
+# ────────────────────────────────────────────────
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """
+    Seconds until a reset/retry header expires. Accepts plain seconds ("20"),
+    durations ("1m30s", "250ms"), epoch seconds/millis, or an HTTP date.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        number = float(value)
+        now = time.time()
+        if number > 1e12:       # epoch millis
+            return max(0.0, number / 1000 - now)
+        if number > 1e9:        # epoch seconds
+            return max(0.0, number - now)
+        return max(0.0, number)
+    except ValueError:
+        pass
+
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+        return sum(float(n) * scale[u] for n, u in parts)
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Server-requested delay carried by an HTTP error, if any"""
+    if isinstance(error, httpx.HTTPStatusError):
+        headers = error.response.headers
+        return parse_reset(headers.get("retry-after")) or parse_reset(headers.get("x-ratelimit-reset"))
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (httpx.TimeoutException, httpx.ConnectError, httpx.RemoteProtocolError)):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS
+    return False
+
+
+def backoff_delay(attempt: int, server_delay: Optional[float] = None) -> float:
+    """Exponential backoff with full jitter; never shorter than the server's Retry-After"""
+    ceiling = min(BACKOFF["max"], BACKOFF["base"] * (2 ** (attempt - 1)))
+    delay = random.uniform(0, ceiling)
+    if server_delay is not None:
+        delay = max(delay, server_delay)
+    return delay
@@ -0,0 +1,73 @@
+import asyncio
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from .ratelimit import drop_limiters
+
+# ────────────────────────────────────────────────
+# Shared provider sessions
+# One long-lived keep-alive pool per base URL, so every turn after the
+# first skips the TCP + TLS handshake to OpenRouter / xAI.
+# ────────────────────────────────────────────────
+
+try:
+    import h2  # noqa: F401  (optional - enables HTTP/2 multiplexing)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+POOL_CONFIG = {
+    "max_connections": 20,
+    "max_keepalive_connections": 10,
+    "keepalive_expiry": 120.0,
+    "connect_timeout": 10.0,
+    "http2": True,
+}
+
+# Keyed by (event loop id, base_url) - an httpx pool cannot be shared across loops
+_sessions: Dict[Tuple[int, str], httpx.AsyncClient] = {}
+
+
+def configure_pool(**overrides) -> None:
+    """Override pool limits. Only affects sessions created afterwards."""
+    unknown = set(overrides) - set(POOL_CONFIG)
+    if unknown:
+        raise ValueError(f"Unknown pool option(s): {', '.join(sorted(unknown))}")
+    POOL_CONFIG.update(overrides)
+
+
+def get_session(base_url: str, timeout: Optional[float] = None) -> httpx.AsyncClient:
+    """
+    Return the shared AsyncClient for base_url on the running loop,
+    creating it on first use. Per-request timeouts are passed to .post()/.stream().
+    """
+    key = (id(asyncio.get_running_loop()), base_url)
+    client = _sessions.get(key)
+    if client is None or client.is_closed:
+        limits = httpx.Limits(
+            max_connections=POOL_CONFIG["max_connections"],
+            max_keepalive_connections=POOL_CONFIG["max_keepalive_connections"],
+            keepalive_expiry=POOL_CONFIG["keepalive_expiry"],
+        )
+        client = httpx.AsyncClient(
+            base_url=base_url,
+            limits=limits,
+            timeout=httpx.Timeout(timeout, connect=POOL_CONFIG["connect_timeout"]),
+            http2=POOL_CONFIG["http2"] and HTTP2_AVAILABLE,
+        )
+        _sessions[key] = client
+    return client
+
+
+async def close_sessions() -> None:
+    """
+    Shutdown hook - close every pool owned by the running loop and forget its
+    rate limiters, so a later loop reusing the same id starts fresh.
+    """
+    loop_id = id(asyncio.get_running_loop())
+    drop_limiters(loop_id)
+    for key in [k for k in _sessions if k[0] == loop_id]:
+        client = _sessions.pop(key)
+        if not client.is_closed:
+            await client.aclose()
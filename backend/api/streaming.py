@@ -0,0 +1,86 @@
+import json
+import time
+from typing import Dict, Any, AsyncIterator, Callable, Optional
+
+import httpx
+
+from .timing import current_timer
+
+# ────────────────────────────────────────────────
+# Server-sent events for OpenAI-compatible /chat/completions
+# Yields {"type": "delta", "content": str} as text arrives, then one
+# {"type": "done", ...} event carrying the full text, usage and timings.
+# A single {"type": "activity"} event marks the first streamed chunk of any
+# kind - reasoning models (deepseek-r1) stream delta.reasoning long before
+# any content, and hedging must not mistake that for a stalled request.
+# ────────────────────────────────────────────────
+
+REASONING_FIELDS = ("reasoning", "reasoning_content")  # OpenRouter / DeepSeek native
+
+
+async def stream_chat_completion(
+    client: httpx.AsyncClient,
+    payload: Dict[str, Any],
+    headers: Dict[str, str],
+    timeout: float,
+    on_headers: Optional[Callable[[httpx.Headers], None]] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    payload = {**payload, "stream": True, "stream_options": {"include_usage": True}}
+    start_time = time.time()
+    first_token_time = None
+    active = False
+    parts = []
+    chunks = 0
+    usage: Dict[str, Any] = {}
+    timer = current_timer()
+
+    async with client.stream("POST", "/chat/completions", json=payload, headers=headers,
+                             timeout=timeout, extensions={"trace": timer.trace_hook()}) as response:
+        if on_headers:
+            on_headers(response.headers)
+        if response.is_error:
+            await response.aread()
+            response.raise_for_status()
+
+        async for line in response.aiter_lines():
+            # Blank lines separate events; ':' lines are keep-alive comments
+            if not line or line.startswith(":") or not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+
+            decode_start = time.perf_counter()
+            chunk = json.loads(data)
+            timer.add("json_decode", time.perf_counter() - decode_start)
+            if "error" in chunk:
+                raise RuntimeError(f"Stream error: {chunk['error']}")
+            if chunk.get("usage"):
+                usage = chunk["usage"]
+
+            for choice in chunk.get("choices", []):
+                delta = choice.get("delta") or {}
+                if not active and any(delta.get(field) for field in REASONING_FIELDS + ("content",)):
+                    active = True
+                    yield {"type": "activity"}
+                text = delta.get("content")
+                if text:
+                    if first_token_time is None:
+                        first_token_time = time.time()
+                    parts.append(text)
+                    chunks += 1
+                    yield {"type": "delta", "content": text}
+
+    end_time = time.time()
+    completion_tokens = usage.get("completion_tokens") or chunks  # one chunk ≈ one token if no usage
+    ttft_ms = (first_token_time - start_time) * 1000 if first_token_time else None
+    gen_seconds = end_time - (first_token_time or start_time)
+
+    yield {
+        "type": "done",
+        "content": "".join(parts),
+        "usage": usage,
+        "latency_ms": (end_time - start_time) * 1000,
+        "ttft_ms": ttft_ms,
+        "tokens_per_sec": completion_tokens / gen_seconds if gen_seconds > 0 else 0.0
+    }
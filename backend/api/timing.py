@@ -0,0 +1,182 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# ────────────────────────────────────────────────
+# Per-turn phase timing
+# main.py activates a TurnTimer around each turn; the clients find it
+# through a context variable (current_timer) and add their phases, with
+# connect / TTFB / download taken from httpx's trace hook. Phases from
+# best-of-N candidates running side by side add up into the same timer.
+# Every finished turn is also folded into a process-wide registry that
+# render_prometheus() exports in the Prometheus text format.
+# ────────────────────────────────────────────────
+
+PHASES = (
+    "prompt_build",      # get_turn_prompt / get_turn_messages + synthesis suffix
+    "rate_limit_wait",   # RateLimiter.acquire, including queueing behind other callers
+    "connect",           # TCP connect + TLS handshake (0 on a reused keep-alive connection)
+    "ttfb",              # request sent -> response headers
+    "download",          # response body; for streams this spans the whole generation
+    "json_decode",       # response / SSE chunk parsing (inside download when streaming)
+    "retry_backoff",     # sleeping between failed attempts
+    "analyzer",          # disagreement energy + crux extraction
+    "log_write",         # appending the turn to the log (not in the turn's own record)
+)
+
+# httpcore trace span -> phase
+_TRACE_PHASES = {
+    "connect_tcp": "connect",
+    "start_tls": "connect",
+    "receive_response_headers": "ttfb",
+    "receive_response_body": "download",
+}
+
+# Histogram buckets in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class TurnTimer:
+    def __init__(self):
+        self.phases: Dict[str, float] = {phase: 0.0 for phase in PHASES}
+        self.attempts = 0
+        self.retries = 0
+        self.started = time.perf_counter()
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def span(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - start)
+
+    def trace_hook(self):
+        """Fresh httpx `extensions={"trace": ...}` callback for one request"""
+        opened: Dict[str, float] = {}
+
+        async def trace(event: str, info: Dict):
+            _, _, rest = event.partition(".")   # "http11.receive_response_body.started"
+            name, _, stage = rest.rpartition(".")
+            if name == "response_closed":
+                # A stream left at [DONE] closes before its body span completes
+                name, stage = "receive_response_body", "complete"
+            if name not in _TRACE_PHASES:
+                return
+            if stage == "started":
+                opened[name] = time.perf_counter()
+            elif name in opened:
+                self.add(_TRACE_PHASES[name], time.perf_counter() - opened.pop(name))
+
+        return trace
+
+    def as_dict(self) -> Dict:
+        return {
+            "turn_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "phases_ms": {phase: round(seconds * 1000, 2) for phase, seconds in self.phases.items()},
+            "attempts": self.attempts,
+            "retries": self.retries
+        }
+
+
+_current: ContextVar[Optional[TurnTimer]] = ContextVar("turn_timer", default=None)
+
+
+def current_timer() -> TurnTimer:
+    """The active turn's timer, or a throwaway one outside a timed turn"""
+    timer = _current.get()
+    return timer if timer is not None else TurnTimer()
+
+
+async def run_timed(timer: TurnTimer, awaitable):
+    """Await with `timer` active for everything the awaitable (and its child tasks) does"""
+    token = _current.set(timer)
+    try:
+        return await awaitable
+    finally:
+        _current.reset(token)
+
+
+def summarize(timings: List[Dict]) -> Dict:
+    """Per-debate timing section from the turns' as_dict() outputs"""
+    summary = {
+        "turns": len(timings),
+        "attempts": sum(t["attempts"] for t in timings),
+        "retries": sum(t["retries"] for t in timings),
+        "turn_ms_total": round(sum(t["turn_ms"] for t in timings), 2),
+        "phases_ms": {}
+    }
+    for phase in PHASES:
+        values = sorted(t["phases_ms"].get(phase, 0.0) for t in timings)
+        if not values:
+            continue
+        summary["phases_ms"][phase] = {
+            "total": round(sum(values), 2),
+            "mean": round(sum(values) / len(values), 2),
+            "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+            "max": values[-1]
+        }
+    return summary
+
+# ────────────────────────────────────────────────
+# PROCESS-WIDE REGISTRY (Prometheus text format)
+# ────────────────────────────────────────────────
+
+_registry = {
+    "turns": 0,
+    "attempts": 0,
+    "retries": 0,
+    "phases": {phase: {"sum": 0.0, "count": 0, "buckets": [0] * len(BUCKETS)} for phase in PHASES},
+}
+
+
+def observe_turn(timer: TurnTimer):
+    _registry["turns"] += 1
+    _registry["attempts"] += timer.attempts
+    _registry["retries"] += timer.retries
+    for phase, seconds in timer.phases.items():
+        entry = _registry["phases"].setdefault(phase, {"sum": 0.0, "count": 0, "buckets": [0] * len(BUCKETS)})
+        entry["sum"] += seconds
+        entry["count"] += 1
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                entry["buckets"][i] += 1
+
+
+def render_prometheus() -> str:
+    lines = [
+        "# HELP mirror_max_turns_total Debate turns completed.",
+        "# TYPE mirror_max_turns_total counter",
+        f"mirror_max_turns_total {_registry['turns']}",
+        "# HELP mirror_max_request_attempts_total Provider requests sent.",
+        "# TYPE mirror_max_request_attempts_total counter",
+        f"mirror_max_request_attempts_total {_registry['attempts']}",
+        "# HELP mirror_max_retries_total Provider requests retried after an error.",
+        "# TYPE mirror_max_retries_total counter",
+        f"mirror_max_retries_total {_registry['retries']}",
+        "# HELP mirror_max_phase_seconds Time per turn spent in each phase.",
+        "# TYPE mirror_max_phase_seconds histogram",
+    ]
+    for phase, entry in _registry["phases"].items():
+        for bound, count in zip(BUCKETS, entry["buckets"]):
+            lines.append(f'mirror_max_phase_seconds_bucket{{phase="{phase}",le="{bound}"}} {count}')
+        lines.append(f'mirror_max_phase_seconds_bucket{{phase="{phase}",le="+Inf"}} {entry["count"]}')
+        lines.append(f'mirror_max_phase_seconds_sum{{phase="{phase}"}} {entry["sum"]:.6f}')
+        lines.append(f'mirror_max_phase_seconds_count{{phase="{phase}"}} {entry["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: Path):
+    """Atomically rewrite a textfile-collector style .prom file"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
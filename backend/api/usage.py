@@ -0,0 +1,35 @@
+from typing import Any, Dict, List, Optional
+
+# ────────────────────────────────────────────────
+# Token accounting shared by every client
+# OpenAI-compatible usage blocks differ per provider in where cached prompt
+# tokens are reported:
+#   OpenRouter / xAI / OpenAI   usage.prompt_tokens_details.cached_tokens
+#   DeepSeek native API         usage.prompt_cache_hit_tokens
+# parse_usage() maps all of them to one shape; tokens_used is always
+# total_tokens (prompt + completion when the provider omits it).
+# ────────────────────────────────────────────────
+
+USAGE_FIELDS = ("prompt_tokens", "completion_tokens", "cached_tokens", "total_tokens")
+
+
+def parse_usage(usage: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    usage = usage or {}
+    prompt = int(usage.get("prompt_tokens") or 0)
+    completion = int(usage.get("completion_tokens") or 0)
+    cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+    if cached is None:
+        cached = usage.get("prompt_cache_hit_tokens")
+    return {
+        "prompt_tokens": prompt,
+        "completion_tokens": completion,
+        "cached_tokens": int(cached or 0),
+        "total_tokens": int(usage.get("total_tokens") or prompt + completion)
+    }
+
+
+def build_messages(prompt: str, system: Optional[str] = None) -> List[Dict[str, str]]:
+    """Chat messages for a prompt, with the invariant system prefix first when given"""
+    messages = [{"role": "system", "content": system}] if system else []
+    messages.append({"role": "user", "content": prompt})
+    return messages
@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from main import CONFIG, run_debate, log_file_for, load_config_file
+from api.session import close_sessions
+
+# ────────────────────────────────────────────────
+# BATCH RUNNER
+# Many topics, one event loop, at most --concurrency debates in flight.
+#   python backend/batch.py topics.txt --concurrency 8
+# ────────────────────────────────────────────────
+
+
+def load_topics(path: Path) -> List[str]:
+    """One topic per line, or JSONL with a "topic" field. Blank / # lines are skipped."""
+    topics = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                topic = json.loads(line).get("topic", "").strip()
+            else:
+                topic = line
+            if topic:
+                topics.append(topic)
+    return topics
+
+
+async def run_batch(topics: List[str], concurrency: int) -> Dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    CONFIG["output_dir"].mkdir(exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    async def run_one(index: int, topic: str) -> Dict:
+        async with semaphore:
+            output_file = log_file_for(f"{timestamp}_{index:04d}")
+            print(f"[{index:04d}] start: {topic[:70]}")
+            log = await run_debate(
+                topic=topic,
+                output_file=output_file,
+                solution_file=output_file.with_suffix(".solution.txt"),
+                verbose=False,
+                close_pools=False
+            )
+            print(f"[{index:04d}] done: {len(log['turns'])} turns, "
+                  f"{log['metadata']['total_tokens']} tokens -> {output_file}")
+            return log
+
+    start = time.time()
+    try:
+        results = await asyncio.gather(
+            *(run_one(i, t) for i, t in enumerate(topics, 1)),
+            return_exceptions=True
+        )
+    finally:
+        await close_sessions()
+    elapsed = time.time() - start
+
+    logs = [r for r in results if isinstance(r, dict)]
+    completed = [log for log in logs if "error" not in log["metadata"]]
+    total_tokens = sum(log["metadata"]["total_tokens"] for log in logs)
+    total_turns = sum(len(log["turns"]) for log in logs)
+
+    return {
+        "debates": len(topics),
+        "completed": len(completed),
+        "failed": len(topics) - len(completed),
+        "turns": total_turns,
+        "total_tokens": total_tokens,
+        "wall_seconds": round(elapsed, 1),
+        "debates_per_hour": round(len(completed) / elapsed * 3600, 1) if elapsed > 0 else 0.0,
+        "tokens_per_sec": round(total_tokens / elapsed, 1) if elapsed > 0 else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many Mirror Max debates concurrently")
+    parser.add_argument("topics_file", type=Path, help="text file (one topic per line) or JSONL")
+    parser.add_argument("--concurrency", type=int, default=4, help="max debates in flight")
+    parser.add_argument("--config", type=Path, help="JSON/YAML file merged into CONFIG")
+    parser.add_argument("--turns", type=int, help="turns per debate")
+    parser.add_argument("--output-dir", type=Path)
+    args = parser.parse_args()
+
+    if args.config:
+        load_config_file(args.config)
+    if args.turns is not None:
+        CONFIG["max_turns"] = args.turns
+    if args.output_dir:
+        CONFIG["output_dir"] = args.output_dir
+
+    topics = load_topics(args.topics_file)
+    if not topics:
+        raise SystemExit(f"No topics found in {args.topics_file}")
+    print(f"Running {len(topics)} debates, concurrency {args.concurrency}")
+
+    summary = asyncio.run(run_batch(topics, args.concurrency))
+
+    print("\n" + "═" * 80)
+    print("BATCH SUMMARY")
+    print("═" * 80)
+    print(f"Debates: {summary['completed']}/{summary['debates']} completed "
+          f"({summary['failed']} with errors)  |  Turns: {summary['turns']}")
+    print(f"Wall time: {summary['wall_seconds']}s  |  "
+          f"{summary['debates_per_hour']} debates/hour  |  {summary['tokens_per_sec']} tokens/sec")
+    print(f"Total tokens: {summary['total_tokens']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from main import CONFIG, run_debate, load_config_file
+from api.session import close_sessions
+from api.timing import summarize
+from mock_server import add_mock_arguments, mock_options, serve_forever
+
+# ────────────────────────────────────────────────
+# END-TO-END BENCHMARK
+# Runs full debates against backend/mock_server.py (in a child process, so
+# its CPU is not counted) and reports per-turn latency percentiles,
+# debates/hour under concurrency and the engine's own CPU time per turn -
+# everything the process does that is not waiting on the network.
+#   python backend/bench.py --debates 16 --concurrency 1,4,16 --latency-ms 200
+# ────────────────────────────────────────────────
+
+BENCH_TOPIC = "Benchmark topic: is the mock model aligned?"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def start_mock(options: Dict) -> Tuple[multiprocessing.Process, str]:
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve_forever, args=("127.0.0.1", 0, options, ready), daemon=True)
+    process.start()
+    return process, ready.get(timeout=10)
+
+
+async def run_scenario(debates: int, concurrency: int, output_dir: Path) -> Dict:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(index: int) -> Dict:
+        async with semaphore:
+            output_file = output_dir / f"mirror_max_bench_c{concurrency}_{index:04d}.jsonl"
+            return await run_debate(
+                topic=f"{BENCH_TOPIC} #{index}",
+                output_file=output_file,
+                solution_file=output_file.with_suffix(".solution.txt"),
+                verbose=False,
+                close_pools=False
+            )
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        results = await asyncio.gather(*(run_one(i) for i in range(debates)), return_exceptions=True)
+    finally:
+        await close_sessions()
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+
+    logs = [r for r in results if isinstance(r, dict)]
+    completed = [log for log in logs if "error" not in log["metadata"]]
+    turns = [turn for log in logs for turn in log["turns"]]
+    latencies = [turn["latency_ms"] for turn in turns]
+    ttfts = [turn["ttft_ms"] for turn in turns if turn.get("ttft_ms") is not None]
+    timing = summarize([turn["timing"] for turn in turns if turn.get("timing")])
+
+    return {
+        "debates": debates,
+        "concurrency": concurrency,
+        "completed": len(completed),
+        "failed": debates - len(completed),
+        "turns": len(turns),
+        "wall_seconds": round(wall, 2),
+        "debates_per_hour": round(len(completed) / wall * 3600, 1) if wall > 0 else 0.0,
+        "latency_ms": {f"p{p}": round(percentile(latencies, p), 1) for p in (50, 95, 99)},
+        "ttft_ms": {f"p{p}": round(percentile(ttfts, p), 1) for p in (50, 95, 99)} if ttfts else None,
+        "cpu_seconds": round(cpu, 3),
+        "cpu_ms_per_turn": round(cpu / len(turns) * 1000, 2) if turns else 0.0,
+        "cpu_share_of_wall": round(cpu / wall, 3) if wall > 0 else 0.0,
+        "retries": timing["retries"],
+        "phase_mean_ms": {phase: stats["mean"] for phase, stats in timing["phases_ms"].items()}
+    }
+
+
+def print_report(results: List[Dict]):
+    print("\n" + "═" * 80)
+    print("BENCHMARK")
+    print("═" * 80)
+    print(f"{'conc':>5} {'done':>7} {'turns':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'debates/h':>10} {'cpu ms/turn':>12} {'cpu/wall':>9}")
+    for r in results:
+        print(f"{r['concurrency']:>5} {r['completed']:>3}/{r['debates']:<3} {r['turns']:>6} "
+              f"{r['latency_ms']['p50']:>9} {r['latency_ms']['p95']:>9} {r['latency_ms']['p99']:>9} "
+              f"{r['debates_per_hour']:>10} {r['cpu_ms_per_turn']:>12} {r['cpu_share_of_wall']:>9}")
+    print("\nMean ms per turn by phase (log_write is not stored per turn):")
+    for r in results:
+        phases = "  ".join(f"{phase}={ms}" for phase, ms in r["phase_mean_ms"].items() if phase != "log_write")
+        print(f"  conc {r['concurrency']}: {phases}  retries={r['retries']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end Mirror Max benchmark against a mock LLM")
+    parser.add_argument("--debates", type=int, default=8, help="debates per concurrency level")
+    parser.add_argument("--concurrency", default="1,4", help="comma-separated concurrency levels")
+    parser.add_argument("--turns", type=int, default=6, help="turns per debate")
+    parser.add_argument("--config", type=Path, help="JSON/YAML file merged into CONFIG")
+    parser.add_argument("--url", help="use an already running mock (or real) endpoint instead")
+    parser.add_argument("--no-stream", action="store_true", help="non-streaming requests")
+    parser.add_argument("--rpm", type=int, default=1_000_000, help="client rate limit per model")
+    parser.add_argument("--output-dir", type=Path, help="keep the debate logs here (default: temp dir)")
+    parser.add_argument("--json", type=Path, help="also write the results as JSON")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    if args.config:
+        load_config_file(args.config)
+    CONFIG["max_turns"] = args.turns
+    CONFIG["stream"] = not args.no_stream
+    CONFIG["cache"]["mode"] = "off"
+    for provider in CONFIG["rate_limits"]:
+        CONFIG["rate_limits"][provider] = {"rpm": args.rpm, "tpm": args.rpm * 1000}
+
+    process = None
+    if args.url:
+        base_url = args.url
+    else:
+        process, base_url = start_mock(mock_options(args))
+        os.environ.setdefault("OPENROUTER_API_KEY", "mock")
+        os.environ.setdefault("GROK_API_KEY", "mock")
+    for participant in CONFIG["participants"].values():
+        participant["base_url"] = base_url
+    print(f"Benchmarking against {base_url}")
+
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            output_dir = args.output_dir or Path(tmp)
+            output_dir.mkdir(parents=True, exist_ok=True)
+            CONFIG["output_dir"] = output_dir
+            CONFIG["metrics_file"] = str(output_dir / "metrics.prom")
+            for level in [int(c) for c in args.concurrency.split(",")]:
+                result = asyncio.run(run_scenario(args.debates, level, output_dir))
+                print(f"concurrency {level}: {result['completed']}/{result['debates']} debates "
+                      f"in {result['wall_seconds']}s")
+                results.append(result)
+    finally:
+        if process is not None:
+            process.terminate()
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"mock": None if args.url else mock_options(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
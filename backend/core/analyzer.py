@@ -1,48 +1,88 @@
 # backend/core/analyzer.py
 import re
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from .sections import parse_sections
+
+# ────────────────────────────────────────────────
+# Marker tables - compiled once into a single alternation, so a turn is
+# scored in one regex pass. Each marker counts once per turn (presence).
+# ────────────────────────────────────────────────
+
+COUNTER_MARKERS = {  # +0.08 each
+    "however": r"however",
+    "but": r"but",
+    "although": r"although",
+    "disagree": r"disagree(?:s|d|ment|ments)?",
+    "challenge": r"challeng(?:e|es|ed|ing)",
+    "counter": r"counter(?:s|ed|ing)?",
+    "yet": r"yet",
+    "on the other hand": r"on\s+the\s+other\s+hand",
+}
+AGREEMENT_MARKERS = {  # -0.04 each
+    "i agree": r"i\s+agree",
+    "exactly": r"exactly",
+    "correct": r"correct",
+    "you are right": r"you\s+are\s+right",
+    "indeed": r"indeed",
+}
+TAG_BONUSES = {  # protocol tags, matched as [Tag] or [Tag:]
+    "steelman": 0.06,
+    "meta-observation": 0.04,
+    "crux-question": 0.07,
+}
+
+COUNTER_BONUS = 0.08
+AGREEMENT_PENALTY = 0.04
+BASELINE = 0.45
+
+
+def _compile_markers() -> "re.Pattern":
+    alternatives = []
+    for prefix, table in (("c", COUNTER_MARKERS), ("a", AGREEMENT_MARKERS)):
+        for i, pattern in enumerate(table.values()):
+            alternatives.append(rf"(?P<{prefix}{i}>\b{pattern}\b)")
+    for i, tag in enumerate(TAG_BONUSES):
+        alternatives.append(rf"(?P<t{i}>\[{re.escape(tag)}:?\])")
+    return re.compile("|".join(alternatives), re.IGNORECASE)
+
+
+_MARKER_RE = _compile_markers()
+_GROUP_SCORES = {
+    **{f"c{i}": COUNTER_BONUS for i in range(len(COUNTER_MARKERS))},
+    **{f"a{i}": -AGREEMENT_PENALTY for i in range(len(AGREEMENT_MARKERS))},
+    **{f"t{i}": bonus for i, bonus in enumerate(TAG_BONUSES.values())},
+}
+
 
 class DebateAnalyzer:
     """Tools for calculating disagreement energy and extracting insights"""
-    
+
     @staticmethod
     def calculate_disagreement_energy(turn_content: str, previous_turns: List[Dict]) -> float:
         """
         Simple heuristic-based disagreement energy (0.0–1.0)
         Higher = more productive tension
         """
-        energy = 0.45  # neutral baseline
-        
-        text_lower = turn_content.lower()
-        
-        # Bonuses for active engagement
-        counter_markers = ['however', 'but', 'although', 'disagree', 'challenge', 'counter', 'however', 'yet', 'on the other hand']
-        for marker in counter_markers:
-            if marker in text_lower:
-                energy += 0.08
-        
-        if '[steelman]' in text_lower:
-            energy += 0.06
-        
-        if '[meta-observation]' in text_lower:
-            energy += 0.04
-        
-        # Bonus for explicit crux
-        if '[crux-question]' in text_lower:
-            energy += 0.07
-        
-        # Penalty for excessive agreement without substance
-        agreement_markers = ['i agree', 'exactly', 'correct', 'you are right', 'indeed']
-        for marker in agreement_markers:
-            if marker in text_lower:
-                energy -= 0.04
-        
+        found = {m.lastgroup for m in _MARKER_RE.finditer(turn_content)}
+        energy = BASELINE + sum(_GROUP_SCORES[group] for group in found)
+
         # Cap
         return max(0.0, min(1.0, energy))
-    
+
+    @staticmethod
+    def extract_crux_questions(content: str, sections: Optional[Dict[str, List[str]]] = None) -> List[str]:
+        """All [Crux-Question:] blocks, from already parsed sections when given"""
+        if sections is None:
+            sections = parse_sections(content)
+        return list(sections.get("crux", []))
+
     @staticmethod
-    def extract_crux_questions(content: str) -> List[str]:
-        """Extract all [Crux-Question:] blocks"""
-        pattern = r'\[Crux-Question:\]\s*(.*?)(?=\[|$|\n\s*\n)'
-        matches = re.findall(pattern, content, re.DOTALL | re.IGNORECASE)
-        return [m.strip() for m in matches if m.strip()]
+    def score_turn(content: str) -> Dict:
+        """Energy, sections and cruxes for one turn (used by the offline re-scorer)"""
+        sections = parse_sections(content)
+        return {
+            "disagreement_energy": round(DebateAnalyzer.calculate_disagreement_energy(content, []), 3),
+            "sections": sections,
+            "cruxes": DebateAnalyzer.extract_crux_questions(content, sections)
+        }
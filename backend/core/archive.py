@@ -0,0 +1,270 @@
+# backend/core/archive.py
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .logstore import load_debate_log
+
+# ────────────────────────────────────────────────
+# Searchable debate archive (SQLite + FTS5)
+#   files     path, mtime, size, sha256 - what has been ingested
+#   debates   one row per log: topic, models, totals
+#   turns     one row per turn: speaker, model, energy, tokens, latency
+#   turns_fts content / cruxes / topic, rowid = turns.id, bm25-ranked
+# Ingestion is incremental: unchanged mtime+size skips the file, an
+# unchanged hash only refreshes the stat, anything else is re-indexed.
+# ────────────────────────────────────────────────
+
+LOG_GLOB = "mirror_max_*.json*"
+
+# bm25 column weights: content, cruxes, topic
+FTS_WEIGHTS = (1.0, 2.0, 0.5)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS debates (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL REFERENCES files(path),
+    topic TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    models TEXT,
+    turns INTEGER,
+    total_tokens INTEGER,
+    total_latency_ms REAL,
+    avg_energy REAL,
+    incomplete INTEGER
+);
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY,
+    debate_id INTEGER NOT NULL REFERENCES debates(id),
+    turn INTEGER,
+    speaker TEXT,
+    model TEXT,
+    role TEXT,
+    energy REAL,
+    tokens INTEGER,
+    latency_ms REAL,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS turns_debate ON turns(debate_id);
+CREATE INDEX IF NOT EXISTS turns_energy ON turns(energy);
+CREATE INDEX IF NOT EXISTS debates_start ON debates(start_time);
+CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5(
+    content, cruxes, topic, tokenize = 'porter unicode61'
+);
+"""
+
+
+def find_log_files(root: Path) -> List[Path]:
+    root = Path(root)
+    if root.is_file():
+        return [root]
+    return [p for p in sorted(root.rglob(LOG_GLOB)) if p.suffix in (".json", ".jsonl")]
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DebateArchive:
+    def __init__(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), timeout=30.0)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(_SCHEMA)
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    # ── ingestion ─────────────────────────────────
+
+    def ingest(self, roots: Iterable[Path], prune: bool = True, batch_size: int = 200) -> Dict:
+        """Index new/changed logs under roots; with prune, drop entries whose file is gone"""
+        roots = [Path(r) for r in roots]  # iterated twice (scan + prune)
+        stats = {"scanned": 0, "indexed": 0, "unchanged": 0, "touched": 0, "removed": 0, "errors": 0}
+        known = {row[0]: (row[1], row[2], row[3])
+                 for row in self.db.execute("SELECT path, mtime, size, sha256 FROM files")}
+        seen = set()
+        pending = 0
+
+        for root in roots:
+            for file in find_log_files(root):
+                key = str(file.resolve())
+                seen.add(key)
+                stats["scanned"] += 1
+                stat = file.stat()
+                previous = known.get(key)
+                if previous and previous[0] == stat.st_mtime and previous[1] == stat.st_size:
+                    stats["unchanged"] += 1
+                    continue
+
+                sha = _sha256(file)
+                if previous and previous[2] == sha:
+                    self.db.execute("UPDATE files SET mtime = ?, size = ? WHERE path = ?",
+                                    (stat.st_mtime, stat.st_size, key))
+                    stats["touched"] += 1
+                else:
+                    try:
+                        log = load_debate_log(file)
+                    except (OSError, json.JSONDecodeError):
+                        stats["errors"] += 1
+                        continue
+                    self._remove(key)
+                    self._insert(key, log)
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO files (path, mtime, size, sha256, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                        (key, stat.st_mtime, stat.st_size, sha, time.time())
+                    )
+                    stats["indexed"] += 1
+
+                pending += 1
+                if pending >= batch_size:
+                    self.db.commit()
+                    pending = 0
+
+        if prune:
+            roots_resolved = [str(r.resolve()) for r in roots]
+            for key in known:
+                # Under a root: the root file itself or a path inside it (not a sibling like logs2/)
+                under_root = any(key == r or key.startswith(r.rstrip(os.sep) + os.sep) for r in roots_resolved)
+                if key not in seen and under_root and not Path(key).exists():
+                    self._remove(key)
+                    self.db.execute("DELETE FROM files WHERE path = ?", (key,))
+                    stats["removed"] += 1
+
+        self.db.commit()
+        return stats
+
+    def _remove(self, path: str):
+        row = self.db.execute("SELECT id FROM debates WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return
+        self.db.execute("DELETE FROM turns_fts WHERE rowid IN (SELECT id FROM turns WHERE debate_id = ?)", (row[0],))
+        self.db.execute("DELETE FROM turns WHERE debate_id = ?", (row[0],))
+        self.db.execute("DELETE FROM debates WHERE id = ?", (row[0],))
+
+    def _insert(self, path: str, log: Dict):
+        config = log.get("config", {})
+        metadata = log.get("metadata", {})
+        turns = log.get("turns", [])
+        topic = config.get("topic", "")
+        participant_models = {name: info.get("model") for name, info in config.get("participants", {}).items()}
+        models = sorted({t.get("model") or participant_models.get(t.get("speaker")) or "unknown" for t in turns})
+
+        cursor = self.db.execute(
+            "INSERT INTO debates (path, topic, start_time, end_time, models, turns, total_tokens, "
+            "total_latency_ms, avg_energy, incomplete) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, topic, log.get("start_time"), log.get("end_time"), ",".join(models), len(turns),
+             metadata.get("total_tokens", 0), metadata.get("total_latency_ms", 0.0),
+             metadata.get("avg_disagreement_energy", 0.0),
+             int(bool(metadata.get("incomplete") or metadata.get("error"))))
+        )
+        debate_id = cursor.lastrowid
+
+        for t in turns:
+            cursor = self.db.execute(
+                "INSERT INTO turns (debate_id, turn, speaker, model, role, energy, tokens, latency_ms, timestamp) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (debate_id, t.get("turn"), t.get("speaker"),
+                 t.get("model") or participant_models.get(t.get("speaker")), t.get("role"),
+                 t.get("disagreement_energy", 0.0), t.get("tokens_used", 0), t.get("latency_ms", 0.0),
+                 t.get("timestamp"))
+            )
+            self.db.execute(
+                "INSERT INTO turns_fts (rowid, content, cruxes, topic) VALUES (?, ?, ?, ?)",
+                (cursor.lastrowid, t.get("content", ""), "\n".join(t.get("cruxes", [])), topic)
+            )
+
+    # ── queries ───────────────────────────────────
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        column: Optional[str] = None,
+        min_energy: Optional[float] = None,
+        model: Optional[str] = None,
+        topic: Optional[str] = None,
+        per_debate: bool = False
+    ) -> List[Dict]:
+        """
+        bm25-ranked turns matching an FTS5 query (column = content | cruxes | topic
+        restricts the match). per_debate keeps only the best turn of each debate.
+        A query that is not valid FTS5 syntax is retried as plain quoted terms.
+        """
+        try:
+            return self._search(query, limit, column, min_energy, model, topic, per_debate)
+        except sqlite3.OperationalError:
+            quoted = " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+            return self._search(quoted, limit, column, min_energy, model, topic, per_debate)
+
+    def _search(self, query, limit, column, min_energy, model, topic, per_debate) -> List[Dict]:
+        match = f"{{{column}}} : ({query})" if column else query
+        where, params = ["turns_fts MATCH ?"], [match]
+        if min_energy is not None:
+            where.append("t.energy >= ?")
+            params.append(min_energy)
+        if model:
+            where.append("t.model LIKE ?")
+            params.append(f"%{model}%")
+        if topic:
+            where.append("d.topic LIKE ?")
+            params.append(f"%{topic}%")
+
+        # Rank first, then build snippets for the returned page only
+        sql = f"""
+            SELECT turns_fts.rowid AS rowid, t.debate_id AS debate_id,
+                   bm25(turns_fts, {', '.join(map(str, FTS_WEIGHTS))}) AS score
+            FROM turns_fts
+            JOIN turns t ON t.id = turns_fts.rowid
+            JOIN debates d ON d.id = t.debate_id
+            WHERE {' AND '.join(where)}
+        """
+        if per_debate:
+            sql = f"""
+                SELECT rowid, score FROM (
+                    SELECT rowid, score, ROW_NUMBER() OVER (PARTITION BY debate_id ORDER BY score) AS pick
+                    FROM ({sql})
+                ) WHERE pick = 1
+            """
+        sql = f"SELECT rowid, score FROM ({sql}) ORDER BY score LIMIT ?"
+        ranked = self.db.execute(sql, params + [limit]).fetchall()
+        if not ranked:
+            return []
+
+        ids = [rowid for rowid, _ in ranked]
+        marks = ", ".join("?" * len(ids))
+        details = {row[0]: row[1:] for row in self.db.execute(f"""
+            SELECT turns_fts.rowid, d.path, d.topic, t.turn, t.speaker, t.model, t.energy, t.tokens,
+                   t.latency_ms, snippet(turns_fts, -1, '[', ']', '…', 16)
+            FROM turns_fts
+            JOIN turns t ON t.id = turns_fts.rowid
+            JOIN debates d ON d.id = t.debate_id
+            WHERE turns_fts MATCH ? AND turns_fts.rowid IN ({marks})
+        """, [match] + ids)}
+
+        columns = ("path", "topic", "turn", "speaker", "model", "energy", "tokens", "latency_ms", "snippet")
+        return [{"score": score, **dict(zip(columns, details[rowid]))} for rowid, score in ranked]
+
+    def stats(self) -> Dict:
+        debates, tokens = self.db.execute("SELECT COUNT(*), COALESCE(SUM(total_tokens), 0) FROM debates").fetchone()
+        turns = self.db.execute("SELECT COUNT(*) FROM turns").fetchone()[0]
+        return {"debates": debates, "turns": turns, "total_tokens": tokens}
@@ -0,0 +1,126 @@
+# backend/core/budget.py
+import re
+from typing import List, Dict, Optional, Tuple
+
+from .context import ContextManager
+
+_WORD_RE = re.compile(r"\S+")
+
+BLOCK_SIZE = 4        # older turns are digested in blocks of this many
+DIGEST_CHARS = 70     # per-turn text kept inside a block digest
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fast local token estimate (no tokenizer dependency).
+    BPE tokenizers average ~4 chars or ~0.75 words per token on English prose;
+    take the larger so code/markup-heavy text is not under-counted.
+    """
+    if not text:
+        return 0
+    return max(len(text) // 4, len(_WORD_RE.findall(text)) * 4 // 3) + 1
+
+
+def _digest(turns: List[Dict]) -> str:
+    """One line standing in for a block of older turns"""
+    first, last = turns[0]["turn"], turns[-1]["turn"]
+    parts = []
+    for turn in turns:
+        text = turn["claim"] or turn["preview"]
+        text = text.replace("\n", " ")
+        parts.append(f"T{turn['turn']}: {text[:DIGEST_CHARS]}")
+    return f"Turns {first}–{last}: " + " | ".join(parts)
+
+
+def build_budgeted_context(
+    context_manager: ContextManager,
+    budget_tokens: int,
+    last_n: int = 5,
+    crux_window: int = 6,
+    current_speaker: Optional[str] = None
+) -> Tuple[str, str]:
+    """
+    Returns (recent_context, disagreement_delta) fitting in budget_tokens.
+    Filled in priority order until the budget runs out:
+      1. unresolved cruxes from the last crux_window turns (newest first)
+      2. latest opponent claim (newest turn not by current_speaker)
+      3. most recent synthesis / final solution
+      4. summary lines for the last_n turns (newest first)
+      5. older turns as block digests, collapsing to a single line when short on room
+    Output is re-ordered chronologically for the model.
+    """
+    history = context_manager.history
+    if not history:
+        return ("[No prior exchanges - opening statements]",
+                "No disagreements yet - initial statements only")
+
+    remaining = budget_tokens
+
+    def fits(text: str) -> bool:
+        nonlocal remaining
+        cost = estimate_tokens(text)
+        if cost > remaining:
+            return False
+        remaining -= cost
+        return True
+
+    # 1. Cruxes
+    cruxes, seen = [], set()
+    for turn in reversed(history[-crux_window:]):
+        crux = turn["crux"]
+        if crux and crux not in seen and fits(crux):
+            seen.add(crux)
+            cruxes.insert(0, f"(T{turn['turn']}) {crux}")
+    if cruxes:
+        delta = "Unresolved cruxes:\n• " + "\n• ".join(cruxes)
+    elif len(history) < 2:
+        delta = "No disagreements yet - initial statements only"
+    else:
+        delta = "No explicit crux questions identified in recent turns"
+
+    # 2 + 3. Latest claim and latest synthesis
+    pinned = []
+    latest = context_manager.latest_opponent_turn(current_speaker)
+    claim_line = f"Latest claim (Turn {latest['turn']}, {latest['speaker']}): {latest['claim'] or latest['preview']}"
+    if fits(claim_line):
+        pinned.append(claim_line)
+    synthesis = context_manager.latest_synthesis
+    if synthesis is not None:
+        synthesis_line = f"Latest synthesis (Turn {synthesis['turn']}): {synthesis['synthesis']}"
+        if fits(synthesis_line):
+            pinned.append(synthesis_line)
+
+    # 4. Recent turns
+    recent_turns = history[-last_n:]
+    recent_lines = []
+    for turn in reversed(recent_turns):
+        if not fits(turn["summary_line"]):
+            break
+        recent_lines.insert(0, turn["summary_line"])
+    # Recent turns that did not fit fall through to the digest tier
+    end = len(history) - len(recent_lines)
+
+    # 5. Older turns, hierarchically: block digests newest first, then one collapsed line.
+    # Walks backwards only as far as the budget allows, so cost does not grow with history.
+    digests = []
+    while end > 0:
+        start = max(0, end - BLOCK_SIZE)
+        line = _digest(history[start:end])
+        if not fits(line):
+            break
+        digests.insert(0, line)
+        end = start
+    if end > 0:
+        first, last = history[0]["turn"], history[end - 1]["turn"]
+        collapsed = f"Turns {first}–{last}: {end} earlier turns omitted (context budget)"
+        remaining -= estimate_tokens(collapsed)  # always shown, even if it overshoots slightly
+        digests.insert(0, collapsed)
+
+    sections = []
+    if digests:
+        sections.append("Earlier turns (digest):\n" + "\n".join(digests))
+    if recent_lines:
+        sections.append("\n".join(recent_lines))
+    if pinned:
+        sections.append("\n".join(pinned))
+    return "\n\n".join(sections), delta
@@ -1,47 +1,76 @@
 # backend/core/context.py
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from .sections import parse_sections, first_section
+
+PREVIEW_CHARS = 180
+CRUX_CHARS = 120
+CLAIM_CHARS = 240
+
 
 class ContextManager:
-    """Manages rolling context, summaries and disagreement tracking"""
-    
+    """
+    Manages rolling context, summaries and disagreement tracking.
+    One instance lives for the whole debate; each turn's preview, summary line
+    and crux are computed once in add_turn, so prompt building costs O(last_n).
+    """
+
     def __init__(self):
-        self.history: List[Dict] = []  # full history of turns
-        
-    def add_turn(self, speaker: str, content: str, turn_number: int):
-        self.history.append({
+        self.history: List[Dict] = []  # compact per-turn records; raw content is not kept
+        self.latest_synthesis: Optional[Dict] = None  # newest turn with a synthesis/final solution (+ its sections)
+        self.latest_by_speaker: Dict[str, Dict] = {}  # newest turn of each speaker
+
+    def add_turn(self, speaker: str, content: str, turn_number: int,
+                 sections: Optional[Dict[str, List[str]]] = None):
+        """Pass the turn's already parsed sections (see core/sections.py) to skip re-parsing"""
+        if sections is None:
+            sections = parse_sections(content)
+        preview = content[:PREVIEW_CHARS].replace("\n", " ").strip()
+        entry = {
             "turn": turn_number,
             "speaker": speaker,
-            "content": content
-        })
-    
+            "preview": preview,
+            "summary_line": f"Turn {turn_number} ({speaker}): {preview}...",
+            "crux": self._clip(first_section(sections, "crux"), CRUX_CHARS),
+            "claim": self._clip(first_section(sections, "claim"), CLAIM_CHARS),
+            "synthesis": self._clip(first_section(sections, "final_solution", "synthesis"), CLAIM_CHARS),
+            "final_solution": bool(sections.get("final_solution"))
+        }
+        self.history.append(entry)
+        self.latest_by_speaker[speaker] = entry
+        if entry["synthesis"]:
+            # Only the newest synthesis keeps its full sections (for the solution file)
+            self.latest_synthesis = {**entry, "sections": sections}
+
+    def latest_opponent_turn(self, current_speaker: Optional[str] = None) -> Optional[Dict]:
+        """
+        Newest turn by anyone other than current_speaker; in a self-debate
+        (no other speaker yet) the newest turn overall
+        """
+        others = [turn for speaker, turn in self.latest_by_speaker.items() if speaker != current_speaker]
+        if others:
+            return max(others, key=lambda turn: turn["turn"])
+        return self.history[-1] if self.history else None
+
+    @staticmethod
+    def _clip(text: Optional[str], limit: int) -> str:
+        if not text:
+            return ""
+        return text[:limit] + "..." if len(text) > limit else text
+
     def get_rolling_summary(self, last_n: int = 5) -> str:
         """Generate a concise rolling summary of recent exchanges"""
         recent = self.history[-last_n:]
         if not recent:
             return "[No prior exchanges - opening statements]"
-        
-        lines = []
-        for turn in recent:
-            preview = turn["content"][:180].replace("\n", " ").strip()
-            lines.append(f"Turn {turn['turn']} ({turn['speaker']}): {preview}...")
-        return "\n".join(lines)
-    
+        return "\n".join(turn["summary_line"] for turn in recent)
+
     def get_disagreement_delta(self, last_n: int = 3) -> str:
-        """Extract potential unresolved cruxes (basic version - improve later)"""
+        """Unresolved cruxes from the most recent turns"""
         if len(self.history) < 2:
             return "No disagreements yet - initial statements only"
-        
-        recent = self.history[-last_n:]
-        cruxes = []
-        for turn in recent:
-            if "[Crux-Question:]" in turn["content"]:
-                # Very simple extraction - can use regex later
-                start = turn["content"].find("[Crux-Question:]") + 16
-                end = turn["content"].find("[", start) if "[" in turn["content"][start:] else len(turn["content"])
-                crux = turn["content"][start:end].strip()
-                if crux:
-                    cruxes.append(crux[:120] + "..." if len(crux) > 120 else crux)
-        
+
+        cruxes = [turn["crux"] for turn in self.history[-last_n:] if turn["crux"]]
         if not cruxes:
             return "No explicit crux questions identified in recent turns"
         return "Recent cruxes / disagreements:\n• " + "\n• ".join(cruxes)
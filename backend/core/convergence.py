@@ -0,0 +1,98 @@
+# backend/core/convergence.py
+import random
+import re
+import zlib
+from typing import Dict, List, Optional
+
+# ────────────────────────────────────────────────
+# Online convergence monitor
+# After every turn: is disagreement energy flat over the last `window`
+# turns (small least-squares slope and spread), and have the last
+# `stale_turns` turns raised no crux that is new? A crux is "not new" when
+# its MinHash similarity (word 3-gram shingles) to any earlier crux is at
+# least `crux_similarity`. Both together = converged.
+# ────────────────────────────────────────────────
+
+NUM_PERM = 64
+SHINGLE_WORDS = 3
+_MERSENNE = (1 << 61) - 1
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+_rng = random.Random(1729)  # fixed, so signatures are comparable across runs
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(NUM_PERM)]
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> set:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(text: str) -> List[int]:
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles(text)]
+    if not hashes:
+        return []
+    return [min((a * h + b) % _MERSENNE for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    if not sig_a or not sig_b:
+        return 0.0
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / NUM_PERM
+
+
+def energy_trend(values: List[float]) -> Dict[str, float]:
+    """Least-squares slope per turn and max-min spread"""
+    n = len(values)
+    mean_x = (n - 1) / 2
+    mean_y = sum(values) / n
+    var_x = sum((i - mean_x) ** 2 for i in range(n))
+    slope = sum((i - mean_x) * (v - mean_y) for i, v in enumerate(values)) / var_x if var_x else 0.0
+    return {"slope": slope, "spread": max(values) - min(values)}
+
+
+class ConvergenceMonitor:
+    def __init__(self, min_turns: int = 6, window: int = 4, max_slope: float = 0.02,
+                 max_spread: float = 0.15, crux_similarity: float = 0.6, stale_turns: int = 3):
+        self.min_turns = min_turns
+        self.window = window
+        self.max_slope = max_slope
+        self.max_spread = max_spread
+        self.crux_similarity = crux_similarity
+        self.stale_turns = stale_turns
+        self.energies: List[float] = []
+        self.signatures: List[List[int]] = []
+        self.stale_streak = 0  # consecutive turns without a new crux
+
+    def observe(self, energy: float, cruxes: List[str]) -> Dict:
+        """Feed one finished turn; returns its novelty stats"""
+        self.energies.append(energy)
+        novel, best = 0, 0.0
+        for crux in cruxes:
+            signature = minhash(crux)
+            if not signature:
+                continue
+            closest = max((similarity(signature, seen) for seen in self.signatures), default=0.0)
+            best = max(best, closest)
+            if closest < self.crux_similarity:
+                novel += 1
+            self.signatures.append(signature)
+        self.stale_streak = 0 if novel else self.stale_streak + 1
+        return {"novel_cruxes": novel, "max_crux_similarity": round(best, 3)}
+
+    def check(self) -> Optional[Dict]:
+        """Details of the convergence if the debate has converged, else None"""
+        if len(self.energies) < max(self.min_turns, self.window) or self.stale_streak < self.stale_turns:
+            return None
+        trend = energy_trend(self.energies[-self.window:])
+        if abs(trend["slope"]) > self.max_slope or trend["spread"] > self.max_spread:
+            return None
+        return {
+            "energy_slope": round(trend["slope"], 4),
+            "energy_spread": round(trend["spread"], 3),
+            "stale_turns": self.stale_streak,
+            "reason": (f"energy flat over {self.window} turns (slope {trend['slope']:+.3f}, "
+                       f"spread {trend['spread']:.2f}) and no new crux for {self.stale_streak} turns")
+        }
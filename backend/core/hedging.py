@@ -0,0 +1,184 @@
+# backend/core/hedging.py
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+# ────────────────────────────────────────────────
+# Hedged requests
+# The primary call starts alone. If it has shown no activity (no streamed
+# chunk, reasoning included) nor a result after `delay` seconds (or fails),
+# a backup call starts; whichever shows activity first wins and the other
+# is cancelled. The delay follows the observed p95 of the primary's time to
+# first activity (or full latency when not streaming), tracked per model.
+# A primary cut short by a winning backup only yields a lower bound (a
+# censored sample). While more than the tail share of samples is censored
+# the percentile is unknowable, so the delay grows past the largest bound
+# instead - otherwise a primary that is always slower than the current
+# delay would never be observed and would lose every race.
+# ────────────────────────────────────────────────
+
+Call = Callable[[Callable[[str], None], Callable[[], None]], Awaitable[Dict]]  # takes on_delta, on_activity
+
+
+class LatencyTracker:
+    """Rolling window of (ms, censored) latency samples for one model"""
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+
+    def observe(self, ms: float, censored: bool = False):
+        """censored: the call was cancelled after ms, so its latency is at least ms"""
+        self.samples.append((ms, censored))
+
+    def censored_bound(self, pct: float) -> Optional[float]:
+        """Largest censored sample if censored samples exceed the (100 - pct)% tail, else None"""
+        bounds = [ms for ms, censored in self.samples if censored]
+        if not bounds or len(bounds) <= len(self.samples) * (100 - pct) / 100:
+            return None
+        return max(bounds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Censored samples count at their lower bound"""
+        if not self.samples:
+            return None
+        ordered = sorted(ms for ms, _ in self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+_trackers: Dict[str, LatencyTracker] = {}
+
+
+def get_tracker(key: str, window: int = 200) -> LatencyTracker:
+    if key not in _trackers:
+        _trackers[key] = LatencyTracker(window)
+    return _trackers[key]
+
+
+def hedge_delay(tracker: LatencyTracker, percentile: float, min_samples: int,
+                initial_delay: float, min_delay: float, censored_growth: float = 2.0) -> float:
+    """
+    Seconds to wait before hedging: observed percentile once there is enough
+    data, or censored_growth x the largest censored bound while too many
+    races were lost to say where the percentile is
+    """
+    bound = tracker.censored_bound(percentile)
+    if bound is not None:
+        return max(min_delay, initial_delay if len(tracker.samples) < min_samples else 0.0,
+                   bound * censored_growth / 1000)
+    if len(tracker.samples) < min_samples:
+        return initial_delay
+    return max(min_delay, tracker.percentile(percentile) / 1000)
+
+
+class _Attempt:
+    def __init__(self, name: str, call: Call, changed: asyncio.Event):
+        self.name = name
+        self.started = time.perf_counter()
+        self.first_active_at: Optional[float] = None  # first streamed chunk of any kind
+        self.first_token_at: Optional[float] = None   # first content delta
+        self.buffer = []
+        self.sink: Optional[Callable[[str], None]] = None
+        self._changed = changed
+        self.task = asyncio.ensure_future(call(self._on_delta, self._on_activity))
+        self.task.add_done_callback(lambda _: changed.set())
+
+    def _on_activity(self):
+        if self.first_active_at is None:
+            self.first_active_at = time.perf_counter()
+            self._changed.set()
+
+    def _on_delta(self, text: str):
+        self._on_activity()
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        if self.sink is not None:
+            self.sink(text)
+        else:
+            self.buffer.append(text)
+
+    @property
+    def failed(self) -> bool:
+        return self.task.done() and not self.task.cancelled() and self.task.exception() is not None
+
+    @property
+    def has_output(self) -> bool:
+        return self.first_active_at is not None or (self.task.done() and not self.failed)
+
+
+async def hedged_call(
+    primary: Call,
+    backup: Call,
+    delay: float,
+    on_delta: Optional[Callable[[str], None]] = None
+) -> Tuple[Dict, Dict]:
+    """
+    Race primary against a delayed backup; returns (winner's result, hedge info).
+    Deltas of the winner are passed to on_delta (buffered ones first).
+    Raises the primary's error if both fail.
+    """
+    start = time.perf_counter()
+    changed = asyncio.Event()
+    first = _Attempt("primary", primary, changed)
+    second: Optional[_Attempt] = None
+    winner: Optional[_Attempt] = None
+
+    try:
+        while winner is None:
+            for attempt in (first, second):
+                if attempt is not None and attempt.has_output:
+                    winner = attempt
+                    break
+            if winner is not None:
+                break
+            alive = [a for a in (first, second) if a is not None and not a.failed]
+            if second is None and (not alive or time.perf_counter() - start >= delay):
+                second = _Attempt("fallback", backup, changed)
+                continue
+            if not alive:
+                raise first.task.exception()
+            changed.clear()
+            timeout = delay - (time.perf_counter() - start) if second is None else None
+            try:
+                await asyncio.wait_for(changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        decided = time.perf_counter()
+        losers = [a for a in (first, second) if a is not None and a is not winner and not a.task.done()]
+        for attempt in losers:
+            attempt.task.cancel()
+        if losers:
+            await asyncio.gather(*(a.task for a in losers), return_exceptions=True)
+
+    sink = on_delta or (lambda text: None)
+    for text in winner.buffer:
+        sink(text)
+    winner.buffer = []
+    winner.sink = sink
+    result = await winner.task
+    end = time.perf_counter()
+
+    # What the primary told us about its own latency - censored (only a lower
+    # bound) when it was cancelled because the backup won
+    censored = False
+    if first.first_active_at is not None:
+        primary_ms = (first.first_active_at - first.started) * 1000
+    elif first is winner:
+        primary_ms = (end - first.started) * 1000
+    elif first.failed:
+        primary_ms = None
+    else:
+        primary_ms = (decided - first.started) * 1000
+        censored = True
+
+    return result, {
+        "fired": second is not None,
+        "winner": winner.name,
+        "delay_ms": round(delay * 1000, 1),
+        "wall_ms": (end - start) * 1000,
+        "ttft_ms": (winner.first_token_at - start) * 1000 if winner.first_token_at else None,
+        "primary_ms": primary_ms,
+        "primary_censored": censored,
+        "primary_error": str(first.task.exception()) if first.failed else None
+    }
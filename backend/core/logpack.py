@@ -0,0 +1,237 @@
+# backend/core/logpack.py
+import gzip
+import os
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .logstore import dumps, loads, records_to_log
+
+# ────────────────────────────────────────────────
+# Compressed debate pack
+# Many debates in one file as independently compressed frames - one frame
+# per logstore record (header, each turn, footer), so the decompressed
+# stream is plain concatenated JSONL (`zcat archive.jsonl.gz` works).
+#   archive.jsonl.gz   gzip members      archive.jsonl.zst   zstd frames
+#   archive.jsonl.gz.idx  {key: header / turn / footer (offset, length)}
+# Reading one debate or one turn seeks straight to its frames. The index
+# is a sidecar written on flush/close; a missing or short index is rebuilt
+# by scanning frames from where it stops, and a torn last frame left by a
+# crash is cut off before the next append.
+# ────────────────────────────────────────────────
+
+INDEX_VERSION = 1
+PACK_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+_SCAN_CHUNK = 1 << 16
+
+
+def is_pack(path: Path) -> bool:
+    return Path(path).suffix in PACK_SUFFIXES
+
+
+def _codec(name: str, level: Optional[int]):
+    """(compress, decompress, decompressobj) for a codec name"""
+    if name == "gzip":
+        return (lambda data: gzip.compress(data, compresslevel=level or 6, mtime=0),
+                lambda frame: zlib.decompress(frame, 31),
+                lambda: zlib.decompressobj(31))
+    if name == "zstd":
+        try:
+            import zstandard  # optional - only needed for .zst packs
+        except ImportError:
+            raise RuntimeError("zstd packs need the zstandard package (pip install zstandard)")
+        compressor = zstandard.ZstdCompressor(level=level or 6)
+        decompressor = zstandard.ZstdDecompressor()
+        return compressor.compress, decompressor.decompress, decompressor.decompressobj
+    raise RuntimeError(f"Unknown pack codec: {name}")
+
+
+class LogPack:
+    """One compressed pack file; mode "r" reads, "a" reads and appends"""
+
+    def __init__(self, path: Path, mode: str = "r", level: Optional[int] = None):
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + ".idx")
+        self.mode = mode
+        if self.path.suffix not in PACK_SUFFIXES:
+            raise RuntimeError(f"{self.path}: pack files end in {' or '.join(PACK_SUFFIXES)}")
+        self.codec = PACK_SUFFIXES[self.path.suffix]
+        self._compress, self._decompress, self._decompressobj = _codec(self.codec, level)
+        if mode == "r" and not self.path.exists():
+            raise FileNotFoundError(self.path)
+        self._file = open(self.path, "a+b" if mode == "a" else "rb")
+        self.debates: Dict[str, Dict] = {}
+        self.size = 0
+        self._current: Optional[str] = None
+        self._dirty = False
+        self._load_index()
+
+    # ── index ─────────────────────────────────────
+
+    def _load_index(self):
+        self._file.seek(0, os.SEEK_END)
+        actual = self.file_size = self._file.tell()
+        try:
+            with open(self.index_path, "rb") as f:
+                index = loads(f.read())
+        except (OSError, ValueError):
+            index = None
+        if index and index.get("version") == INDEX_VERSION and index.get("codec") == self.codec \
+                and index.get("size", 0) <= actual:
+            self.debates = index["debates"]
+            self.size = index["size"]
+        if self.size < actual:
+            end = self._scan(self.size)
+            self._dirty = True
+            if end < actual and self.mode == "a":
+                self._file.truncate(end)  # torn frame from a crash
+                self.file_size = end
+            self.size = end
+
+    def _scan(self, start: int) -> int:
+        """Index every complete frame from `start`; returns the end of the last one"""
+        self._file.seek(start)
+        view = memoryview(self._file.read())
+        pos = 0
+        while pos < len(view):
+            decompressor, parts, read = self._decompressobj(), [], pos
+            try:
+                while not decompressor.eof and read < len(view):
+                    chunk = view[read:read + _SCAN_CHUNK]
+                    parts.append(decompressor.decompress(chunk))
+                    read += len(chunk)
+                if not decompressor.eof:
+                    break
+                record = loads(b"".join(parts))
+            except Exception:  # corrupt / torn frame (zlib.error, ZstdError, bad JSON)
+                break
+            length = read - pos - len(decompressor.unused_data)
+            self._index_record(record, start + pos, length)
+            pos += length
+        return start + pos
+
+    def _index_record(self, record: Dict, offset: int, length: int):
+        kind = record.get("type")
+        if kind == "header":
+            self._current = record.get("debate") or f"debate_{len(self.debates)}"
+            self.debates[self._current] = {
+                "topic": record.get("config", {}).get("topic"),
+                "start_time": record.get("start_time"),
+                "end_time": None,
+                "header": [offset, length],
+                "turns": [],
+                "footer": None
+            }
+        elif self._current is None:
+            return  # frame before any header - not part of a debate
+        elif kind == "footer":
+            entry = self.debates[self._current]
+            entry["footer"] = [offset, length]
+            entry["end_time"] = record.get("end_time")
+        else:
+            self.debates[self._current]["turns"].append([offset, length])
+
+    def flush(self):
+        """Sync appended frames and rewrite the sidecar index (atomic replace)"""
+        if self.mode != "a" or not self._dirty:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(dumps({"version": INDEX_VERSION, "codec": self.codec, "size": self.size,
+                           "debates": self.debates}))
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ── writing ───────────────────────────────────
+
+    def add(self, key: str, log: Dict):
+        """Append one debate_log; a key that is already packed is replaced (old frames stay until re-pack)"""
+        if self.mode != "a":
+            raise RuntimeError(f"{self.path} is open read-only")
+        records = [{"type": "header", "debate": key, "config": log.get("config", {}),
+                    "start_time": log.get("start_time")}]
+        records.extend({"type": "turn", **turn} for turn in log.get("turns", []))
+        if "end_time" in log:
+            records.append({"type": "footer", "metadata": log.get("metadata", {}), "end_time": log["end_time"]})
+
+        frames = [self._compress(dumps(record) + b"\n") for record in records]
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(b"".join(frames))
+        offset = self.size
+        for record, frame in zip(records, frames):
+            self._index_record(record, offset, len(frame))
+            offset += len(frame)
+        self.size = self.file_size = offset
+        self._dirty = True
+
+    # ── reading ───────────────────────────────────
+
+    def keys(self) -> List[str]:
+        return list(self.debates)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.debates
+
+    def __len__(self) -> int:
+        return len(self.debates)
+
+    def _entry(self, key: str) -> Dict:
+        if key not in self.debates:
+            raise KeyError(f"No debate {key} in {self.path}")
+        return self.debates[key]
+
+    def _read_frames(self, spans: List[Tuple[int, int]]) -> Iterator[Dict]:
+        """Decode frames that lie in one contiguous block with a single read"""
+        start = spans[0][0]
+        end = max(offset + length for offset, length in spans)
+        self._file.seek(start)
+        block = self._file.read(end - start)
+        for offset, length in spans:
+            yield loads(self._decompress(block[offset - start:offset - start + length]))
+
+    def load(self, key: str) -> Dict:
+        """One debate as a debate_log dict"""
+        entry = self._entry(key)
+        spans = [entry["header"], *entry["turns"]] + ([entry["footer"]] if entry["footer"] else [])
+        return records_to_log(self._read_frames(spans))
+
+    def load_turn(self, key: str, position: int) -> Dict:
+        """One turn record (position in the debate's turn list) - decompresses only that frame"""
+        record = next(self._read_frames([self._entry(key)["turns"][position]]))
+        record.pop("type", None)
+        return record
+
+    def iter_logs(self) -> Iterator[Tuple[str, Dict]]:
+        for key in self.keys():
+            yield key, self.load(key)
+
+
+_open_packs: Dict[str, Tuple[int, LogPack]] = {}
+
+
+def open_pack(path: Path) -> LogPack:
+    """
+    Shared read-only pack per path and process (a forked worker must not
+    share the parent's file offset); reopened when the file has grown since.
+    """
+    key = str(Path(path).resolve())
+    owner, pack = _open_packs.get(key, (None, None))
+    if owner != os.getpid() or pack.file_size != os.path.getsize(key):
+        if owner == os.getpid():
+            pack.close()
+        pack = LogPack(Path(key))
+        _open_packs[key] = (os.getpid(), pack)
+    return pack
@@ -0,0 +1,172 @@
+# backend/core/logstore.py
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import orjson
+
+# ────────────────────────────────────────────────
+# Append-only JSONL debate log
+#   {"type": "header", "config": ..., "start_time": ...}
+#   {"type": "turn", ...turn_data}          one line per finished turn
+#   {"type": "footer", "metadata": ..., "end_time": ...}
+# A resumed debate appends a {"type": "resume"} marker and more turns after
+# the old footer; the loader keeps every turn and the last footer, and skips
+# torn lines left by a crash.
+# Each record is flushed as soon as it is written, so a crash or Ctrl-C
+# keeps every completed turn. load_debate_log() rebuilds the classic
+# debate_log dict from this format, a legacy mirror_max_*.json, or a
+# debate inside a compressed pack ("logs/archive.jsonl.gz#<key>", see
+# core/logpack.py).
+# All encoding / decoding goes through orjson; orjson.JSONDecodeError is a
+# json.JSONDecodeError, so callers catching the stdlib error still work.
+# ────────────────────────────────────────────────
+
+PACK_SEPARATOR = "#"
+
+_DUMP_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def dumps(record, indent: bool = False) -> bytes:
+    """UTF-8 JSON bytes, compact unless indent"""
+    return orjson.dumps(record, option=_DUMP_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0))
+
+
+def loads(data):
+    return orjson.loads(data)
+
+
+class DebateLogWriter:
+    """Streams one debate to a .jsonl file; fsyncs every `fsync_every` turns (0 = never)"""
+
+    def __init__(self, path: Path, fsync_every: int = 1):
+        self.path = Path(path)
+        self.fsync_every = fsync_every
+        self._unsynced = 0
+        self._file = open(self.path, "ab+")
+        # A crash can leave a torn last line - start our records on a fresh one
+        if self._file.tell() > 0:
+            self._file.seek(self._file.tell() - 1)
+            if self._file.read(1) != b"\n":
+                self._file.write(b"\n")
+
+    def _write(self, record: Dict, sync: bool = False):
+        self._file.write(dumps(record) + b"\n")
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def write_header(self, config: Dict, start_time: str):
+        self._write({"type": "header", "config": config, "start_time": start_time}, sync=True)
+
+    def append_turn(self, turn_data: Dict):
+        self._unsynced += 1
+        sync = self.fsync_every > 0 and self._unsynced >= self.fsync_every
+        self._write({"type": "turn", **turn_data}, sync=sync)
+
+    def append_record(self, record: Dict):
+        """Any other record type (e.g. a resume marker); ignored by the loader"""
+        self._write(record, sync=True)
+
+    def write_footer(self, metadata: Dict, end_time: str):
+        self._write({"type": "footer", "metadata": metadata, "end_time": end_time}, sync=True)
+
+    def close(self):
+        if not self._file.closed:
+            if self._unsynced:
+                os.fsync(self._file.fileno())
+            self._file.close()
+
+
+def _metadata_from_turns(turns) -> Dict:
+    """Rebuild run totals for a log whose footer was never written"""
+    energy_history = [t.get("disagreement_energy", 0.0) for t in turns]
+    return {
+        "total_tokens": sum((t.get("sampling") or {}).get("tokens_all_candidates", t.get("tokens_used", 0))
+                            for t in turns),
+        "total_latency_ms": sum(t.get("latency_ms", 0.0) for t in turns),
+        "avg_disagreement_energy": round(sum(energy_history) / len(energy_history), 3) if energy_history else 0.0,
+        "energy_history": energy_history,
+        "incomplete": True
+    }
+
+
+def split_pack_path(path) -> Optional[Tuple[Path, str]]:
+    """("logs/archive.jsonl.gz", "<key>") for a packed-debate path, else None"""
+    text = str(path)
+    if PACK_SEPARATOR not in text:
+        return None
+    pack, key = text.rsplit(PACK_SEPARATOR, 1)
+    return (Path(pack), key) if Path(pack).is_file() else None
+
+
+def records_to_log(records) -> Dict:
+    """Rebuild a debate_log dict from header / turn / footer records"""
+    log: Dict = {"config": {}, "start_time": None, "turns": []}
+    footer: Optional[Dict] = None
+    for record in records:
+        kind = record.pop("type", None)
+        if kind == "header":
+            log["config"] = record.get("config", {})
+            log["start_time"] = record.get("start_time")
+        elif kind == "turn":
+            log["turns"].append(record)
+            footer = None  # turns after a footer (resumed run) make it stale
+        elif kind == "footer":
+            footer = record
+
+    if footer is not None:
+        log["metadata"] = footer.get("metadata", {})
+        log["end_time"] = footer.get("end_time")
+    else:
+        log["metadata"] = _metadata_from_turns(log["turns"])
+    return log
+
+
+def _read_records(path: Path):
+    with open(path, "rb") as f:
+        data = f.read()
+    for line in data.split(b"\n"):
+        if not line.strip():
+            continue
+        try:
+            yield loads(line)
+        except orjson.JSONDecodeError:
+            continue  # torn line from a crash - skip it, later records are still valid
+
+
+def load_debate_log(path: Path) -> Dict:
+    """Load a .jsonl, legacy .json or packed ("pack#key") debate log into the debate_log structure"""
+    packed = split_pack_path(path)
+    if packed is not None:
+        from .logpack import open_pack
+        return open_pack(packed[0]).load(packed[1])
+
+    path = Path(path)
+    if path.suffix != ".jsonl":
+        with open(path, "rb") as f:
+            return loads(f.read())
+    return records_to_log(_read_records(path))
+
+
+def save_debate_log(log: Dict, path: Path):
+    """Write a full debate_log dict in the format implied by the file suffix (atomic replace)"""
+    if split_pack_path(path) is not None:
+        raise RuntimeError(f"{path} is inside a pack - packed logs are read-only, unpack it first")
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    if path.suffix == ".jsonl":
+        if tmp_path.exists():
+            tmp_path.unlink()
+        writer = DebateLogWriter(tmp_path, fsync_every=0)
+        writer.write_header(log.get("config", {}), log.get("start_time"))
+        for turn in log.get("turns", []):
+            writer.append_turn(turn)
+        if "end_time" in log:
+            writer.write_footer(log.get("metadata", {}), log["end_time"])
+        writer.close()
+    else:
+        with open(tmp_path, "wb") as f:
+            f.write(dumps(log, indent=True))
+    os.replace(tmp_path, path)
@@ -1,33 +1,154 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from .context import ContextManager  # This import was missing - now added
+from .budget import estimate_tokens, build_budgeted_context
 
 def get_turn_prompt(
-    history: List[Dict],
+    history: Optional[List[Dict]],
     current_speaker: str,
     opponent: str,
     turn_number: int,
     topic: str,
-    max_tokens_guideline: str = "Aim for 400–700 tokens. Maximum: 1024 tokens."
+    max_tokens_guideline: str = "Aim for 400–700 tokens. Maximum: 1024 tokens.",
+    context_manager: Optional[ContextManager] = None,
+    max_input_tokens: Optional[int] = None
 ) -> str:
     """
-    Builds the structured prompt for each turn following v0.1 protocol
+    Builds the structured prompt for each turn following v0.1 protocol.
+    Pass the debate's long-lived context_manager to avoid replaying history;
+    a bare history list is still accepted and replayed into a fresh one.
+    With max_input_tokens, context is compacted to fit (see core/budget.py).
     """
-    context_manager = ContextManager()
-    for h in history:
-        context_manager.add_turn(h["speaker"], h["content"], h["turn"])
+    if context_manager is None:
+        context_manager = ContextManager()
+        for h in history or []:
+            context_manager.add_turn(h["speaker"], h["content"], h["turn"])
     
-    recent_context = context_manager.get_rolling_summary(last_n=5)
-    delta = context_manager.get_disagreement_delta(last_n=3)
+    synthesis_required = (turn_number % 5 == 0)
+    
+    if max_input_tokens is None:
+        recent_context = context_manager.get_rolling_summary(last_n=5)
+        delta = context_manager.get_disagreement_delta(last_n=3)
+        return _render(turn_number, topic, current_speaker, opponent, "last 5 turns",
+                       recent_context, delta, synthesis_required, max_tokens_guideline)
     
+    # Budgeted: whatever the fixed protocol text does not use goes to context
+    skeleton = _render(turn_number, topic, current_speaker, opponent, "budgeted",
+                       "", "", synthesis_required, max_tokens_guideline)
+    available = max(0, max_input_tokens - estimate_tokens(skeleton))
+    recent_context, delta = build_budgeted_context(context_manager, available,
+                                                   current_speaker=current_speaker)
+    return _render(turn_number, topic, current_speaker, opponent, "budgeted",
+                   recent_context, delta, synthesis_required, max_tokens_guideline)
+
+
+def get_turn_messages(
+    current_speaker: str,
+    opponent: str,
+    turn_number: int,
+    topic: str,
+    context_manager: ContextManager,
+    personas: Optional[Dict[str, str]] = None,
+    max_tokens_guideline: str = "Aim for 400–700 tokens. Maximum: 1024 tokens.",
+    max_input_tokens: Optional[int] = None
+) -> Tuple[str, str]:
+    """
+    Prefix-cache-friendly layout: (system, user).
+    The system message holds everything that is the same on every turn of a
+    debate - topic, persona definitions, protocol rules - so providers that
+    cache prompt prefixes (OpenRouter / DeepSeek / xAI) can reuse it; the
+    turn number, speaker assignment and rolling context go last, in the user message.
+    """
+    system = _render_prefix(topic, personas or {}, max_tokens_guideline)
     synthesis_required = (turn_number % 5 == 0)
     
+    if max_input_tokens is None:
+        recent_context = context_manager.get_rolling_summary(last_n=5)
+        delta = context_manager.get_disagreement_delta(last_n=3)
+        return system, _render_turn(turn_number, current_speaker, opponent, "last 5 turns",
+                                    recent_context, delta, synthesis_required)
+    
+    skeleton = _render_turn(turn_number, current_speaker, opponent, "budgeted", "", "", synthesis_required)
+    available = max(0, max_input_tokens - estimate_tokens(system) - estimate_tokens(skeleton))
+    recent_context, delta = build_budgeted_context(context_manager, available,
+                                                   current_speaker=current_speaker)
+    return system, _render_turn(turn_number, current_speaker, opponent, "budgeted",
+                                recent_context, delta, synthesis_required)
+
+
+def _render_prefix(topic: str, personas: Dict[str, str], max_tokens_guideline: str) -> str:
+    participants = ""
+    if personas:
+        participants = "PARTICIPANTS:\n" + "\n".join(f"- {name}: {role}" for name, role in personas.items())
+    prompt = f"""MIRROR MAX DEBATE
+Topic: {topic}
+
+{participants}
+
+DEBATE PROTOCOL v0.1 REQUIREMENTS:
+1. [Reference:] Quote or paraphrase a specific point from opponent
+2. [Claim:] State your position clearly
+3. [Evidence/Reasoning:] Provide support (logic, data, patterns, examples)
+4. [Crux-Question:] Identify core unresolved issue or ask a crux-oriented question
+   (e.g. "What evidence would change your mind on X?")
+
+OPTIONAL (use sparingly):
+- [Steelman:] Charitable restatement of opponent's strongest point
+- [Meta-Observation:] Brief comment on opponent's reasoning style/pattern
+
+SYNTHESIS TURNS (announced in the turn message): Include [Synthesis Attempt:] - Find common ground or clearly state irreconcilable difference.
+
+Be rigorous, charitable, and concise. Prioritize clarity over exhaustiveness.
+{max_tokens_guideline}
+
+Each turn message tells you your role, the recent context and the disagreement delta.
+"""
+    return prompt.strip()
+
+
+def _render_turn(
+    turn_number: int,
+    current_speaker: str,
+    opponent: str,
+    context_label: str,
+    recent_context: str,
+    delta: str,
+    synthesis_required: bool
+) -> str:
+    prompt = f"""TURN {turn_number}
+Your role: {current_speaker}
+Opponent role: {opponent}
+
+RECENT CONTEXT ({context_label}):
+{recent_context}
+
+DISAGREEMENT DELTA:
+{delta}
+
+{"SYNTHESIS TURN: Include [Synthesis Attempt:]." if synthesis_required else ""}
+
+Your response ({current_speaker}):
+"""
+    return prompt.strip()
+
+
+def _render(
+    turn_number: int,
+    topic: str,
+    current_speaker: str,
+    opponent: str,
+    context_label: str,
+    recent_context: str,
+    delta: str,
+    synthesis_required: bool,
+    max_tokens_guideline: str
+) -> str:
     prompt = f"""MIRROR MAX DEBATE - TURN {turn_number}
 Topic: {topic}
 
 Your role: {current_speaker}
 Opponent role: {opponent}
 
-RECENT CONTEXT (last 5 turns):
+RECENT CONTEXT ({context_label}):
 {recent_context}
 
 DISAGREEMENT DELTA:
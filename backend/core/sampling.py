@@ -0,0 +1,98 @@
+# backend/core/sampling.py
+import asyncio
+import itertools
+from typing import Awaitable, Callable, Dict, List
+
+from .analyzer import DebateAnalyzer
+from .sections import parse_sections, section_key
+
+
+def score_candidate(content: str, required_tags: List[str]) -> Dict:
+    """
+    Protocol compliance + disagreement energy for one candidate answer.
+    Tags are checked against the shared section parser, so any spelling it
+    accepts ([Crux:], [claim], ...) counts.
+    """
+    sections = parse_sections(content)
+    missing = [tag for tag in required_tags if not sections.get(section_key(tag))]
+    return {
+        "tags_ok": not missing,
+        "missing_tags": missing,
+        "energy": round(DebateAnalyzer.calculate_disagreement_energy(content, []), 3)
+    }
+
+
+async def best_of_n(
+    sample: Callable[[int], Awaitable[Dict]],
+    n: int,
+    min_energy: float,
+    required_tags: List[str]
+) -> Dict:
+    """
+    Run sample(0..n-1) concurrently and score each result as it finishes.
+    The first candidate with all required tags and energy >= min_energy wins
+    and the still-running requests are cancelled; otherwise the best-scoring
+    finished candidate is returned (ties go to the lower index). Raises the
+    first error if every sample fails.
+    Cache hits finish in their first step, so they are scored in index order
+    before any live result - a read-through replay picks the same winner.
+    """
+    async def indexed(i: int):
+        return i, await sample(i)
+
+    tasks = [asyncio.ensure_future(indexed(i)) for i in range(n)]
+    finished, errors = [], []
+    winner = None
+
+    try:
+        await asyncio.sleep(0)  # let cache hits complete
+        ready = [task for task in tasks if task.done()]
+        pending = [task for task in tasks if not task.done()]
+        for next_done in itertools.chain(ready, asyncio.as_completed(pending)):
+            try:
+                index, result = await next_done
+            except Exception as e:
+                errors.append(e)
+                continue
+            score = score_candidate(result["content"], required_tags)
+            finished.append((index, result, score))
+            if score["tags_ok"] and score["energy"] >= min_energy:
+                winner = (index, result, score)
+                break
+    finally:
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    if not finished:
+        raise errors[0] if errors else RuntimeError("Best-of-N produced no candidates")
+
+    passed = winner is not None
+    if winner is None:
+        winner = max(finished, key=lambda item: (item[2]["tags_ok"], item[2]["energy"], -item[0]))
+
+    # Every finished candidate was paid for (or replayed), not just the winner
+    usage_all: Dict[str, int] = {}
+    for _, r, _ in finished:
+        for field, value in (r.get("usage") or {}).items():
+            usage_all[field] = usage_all.get(field, 0) + value
+
+    index, result, score = winner
+    return {
+        **result,
+        "sampling": {
+            "n": n,
+            "completed": len(finished),
+            "failed": len(errors),
+            "cancelled": n - len(finished) - len(errors),
+            "winner_index": index,
+            "passed_threshold": passed,
+            "scores": [{"index": i, "energy": s["energy"], "tags_ok": s["tags_ok"], "usage": r.get("usage")}
+                       for i, r, s in finished],
+            "tokens_all_candidates": sum(r.get("tokens_used", 0) for _, r, _ in finished),
+            "usage_all_candidates": usage_all,
+            "replayed_tokens_all_candidates": sum(r.get("replayed_tokens", 0) for _, r, _ in finished)
+        }
+    }
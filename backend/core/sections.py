@@ -0,0 +1,69 @@
+# backend/core/sections.py
+import re
+from typing import Dict, List, Optional
+
+# ────────────────────────────────────────────────
+# Protocol tag parser - one regex pass splits a turn into its sections.
+# A section runs from its tag to the next recognised tag; a crux also
+# ends at the first blank line. Tag spelling is forgiving: [Claim:],
+# [claim], [Crux-Question:], [Crux:], [Evidence/Reasoning:], **[Steelman:]**...
+# Parsed once per turn, stored on the turn record as "sections", and read
+# by the analyzer, ContextManager and the solution extraction in main.py.
+# ────────────────────────────────────────────────
+
+SECTION_KEYS = ("reference", "claim", "evidence", "crux", "steelman", "meta", "synthesis", "final_solution")
+
+_TAG_RE = re.compile(
+    r"\[\s*(?:"
+    r"(?P<reference>reference)"
+    r"|(?P<claim>claim)"
+    r"|(?P<evidence>evidence(?:\s*/\s*reasoning)?)"
+    r"|(?P<crux>crux(?:[- ]question)?)"
+    r"|(?P<steelman>steelman)"
+    r"|(?P<meta>meta(?:[- ]observation)?)"
+    r"|(?P<synthesis>synthesis(?:\s+attempt)?)"
+    r"|(?P<final_solution>final\s+solution)"
+    r")\s*:?\s*\]",
+    re.IGNORECASE
+)
+_BLANK_LINE_RE = re.compile(r"\n\s*\n")
+
+# Sections that stop at the first blank line as well as at the next tag
+_PARAGRAPH_SECTIONS = {"crux"}
+
+
+def parse_sections(content: str) -> Dict[str, List[str]]:
+    """{section: [text, ...]} in order of appearance; empty sections are dropped"""
+    sections: Dict[str, List[str]] = {}
+    matches = list(_TAG_RE.finditer(content))
+    for i, match in enumerate(matches):
+        key = match.lastgroup
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(content)
+        text = content[match.end():end]
+        if key in _PARAGRAPH_SECTIONS:
+            blank = _BLANK_LINE_RE.search(text)
+            if blank:
+                text = text[:blank.start()]
+        text = text.strip().strip("*_").strip()
+        if text:
+            sections.setdefault(key, []).append(text)
+    return sections
+
+
+def first_section(sections: Dict[str, List[str]], *keys: str) -> Optional[str]:
+    """First text of the first key present, e.g. first_section(s, "final_solution", "synthesis")"""
+    for key in keys:
+        if sections.get(key):
+            return sections[key][0]
+    return None
+
+
+def section_key(tag: str) -> str:
+    """Section key for a protocol tag ("[Crux-Question:]" -> "crux") or a bare key ("claim")"""
+    tag = tag.strip()
+    if tag in SECTION_KEYS:
+        return tag
+    match = _TAG_RE.fullmatch(tag)
+    if match is None:
+        raise ValueError(f"Unknown protocol tag '{tag}' (expected one of {', '.join(SECTION_KEYS)})")
+    return match.lastgroup
@@ -1,78 +1,380 @@
+import argparse
 import asyncio
 import json
+import logging
 import time
 from datetime import datetime
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 import sys
 
 from core.context import ContextManager
-from core.protocol import get_turn_prompt
+from core.protocol import get_turn_prompt, get_turn_messages
 from core.analyzer import DebateAnalyzer
+from core.budget import estimate_tokens
+from core.logstore import DebateLogWriter, load_debate_log, save_debate_log
+from core.sampling import best_of_n
+from core.sections import parse_sections, first_section
+from core.convergence import ConvergenceMonitor
+from core.hedging import hedged_call, get_tracker, hedge_delay
 
-from api.deepseek_client import deepseek_generate
-# from api.grok_client import grok_generate  # Commented out to avoid 429
+from api.providers import get_provider
+from api.session import configure_pool, close_sessions
+from api.ratelimit import configure_rate_limits
+from api.cache import ResponseCache, cache_key
+from api.usage import USAGE_FIELDS
+from api.timing import TurnTimer, run_timed, observe_turn, summarize, write_prometheus
 
 # ────────────────────────────────────────────────
-# CONFIGURATION + Interactive Topic Prompt
+# CONFIGURATION
 # ────────────────────────────────────────────────
 
-print("\n" + "═" * 80)
-print("MIRROR MAX v0.1 - Cognitive Differential Engine")
-print("Enter your debate topic below (press Enter for default)")
-custom_topic = input("Topic: ").strip()
-
-if custom_topic:
-    TOPIC = custom_topic
-    print(f"Using custom topic: {TOPIC}")
-else:
-    TOPIC = (
-        "The most likely failure mode for AGI alignment in the 2028–2032 timeframe, "
-        "and what single intervention would most reduce that risk — "
-        "assuming current scaling + organizational trajectories continue "
-        "without major pauses or governance breakthroughs."
-    )
-    print("Using default topic.")
+DEFAULT_TOPIC = (
+    "The most likely failure mode for AGI alignment in the 2028–2032 timeframe, "
+    "and what single intervention would most reduce that risk — "
+    "assuming current scaling + organizational trajectories continue "
+    "without major pauses or governance breakthroughs."
+)
 
 CONFIG = {
-    "topic": TOPIC,
+    "topic": DEFAULT_TOPIC,
     "max_turns": 12,
     "max_tokens": 1024,
     "temperature": 0.7,
+    "max_input_tokens": 1500,  # prompt ceiling per turn (None = legacy fixed previews)
+    # prefix  = topic, personas and protocol rules in a fixed system message, per-turn
+    #           context last, so provider prompt caching hits after the first turn
+    # classic = everything in one user message, turn number first
+    "prompt_layout": "prefix",
+    "stream": True,  # print tokens live + record ttft_ms / tokens_per_sec
     "deepseek_first": True,
+    # alternating = DeepSeek self-debate, one turn at a time
+    # rounds      = every enabled participant answers each round concurrently (max_turns = rounds)
+    "schedule": "alternating",
     "output_dir": Path("logs"),
+    "log_format": "jsonl",  # jsonl = append per turn (crash-safe) | json = single dump at the end
+    "log_fsync_every": 1,   # fsync the jsonl log every N turns (0 = leave it to the OS)
+    "metrics_file": "logs/metrics.prom",  # Prometheus text export, rewritten after each debate (None = off)
+    "http_pool": {
+        "max_connections": 20,
+        "max_keepalive_connections": 10,
+        "keepalive_expiry": 120.0,
+        "http2": True
+    },
+    # Best-of-N per turn: n concurrent samples, first one clearing the bar wins (n=1 = off)
+    "best_of_n": {
+        "n": 1,
+        "min_energy": 0.6,
+        "required_tags": ["[Claim:]", "[Crux-Question:]"]
+    },
+    # Early stop: once energy is flat over `window` turns and no new crux (MinHash
+    # similarity < crux_similarity) appeared for `stale_turns` turns, run one forced
+    # final-synthesis turn and stop (metadata.stop_reason = "converged")
+    "convergence": {
+        "enabled": True,
+        "min_turns": 6,
+        "window": 4,
+        "max_slope": 0.02,
+        "max_spread": 0.15,
+        "crux_similarity": 0.6,
+        "stale_turns": 3
+    },
+    # Hedged requests for participants with a "fallback": if the primary has streamed
+    # nothing - reasoning chunks count - (no result when not streaming) after the observed
+    # p95 for its model (initial_delay until min_samples turns are seen), the fallback is
+    # fired too and the first one to answer wins
+    "hedging": {
+        "enabled": True,
+        "percentile": 95,
+        "min_samples": 8,
+        "initial_delay": 10.0,
+        "min_delay": 1.0,
+        "censored_growth": 2.0,  # delay multiplier while the primary keeps losing (cut-short samples)
+        "window": 200
+    },
+    # Response cache: off | read-through | write-only | replay-only
+    "cache": {
+        "mode": "off",
+        "path": "logs/.cache/responses.sqlite3",
+        "max_bytes": 256 * 1024 * 1024,
+        "seed": 0
+    },
+    # Shared per provider+model across every debate in the process
+    "rate_limits": {
+        "openrouter": {"rpm": 20, "tpm": 60000},
+        "xai": {"rpm": 60, "tpm": 100000}
+    },
+    # Provider modules are imported lazily, only for enabled participants.
+    # An optional "base_url" points a participant at another OpenAI-compatible
+    # endpoint (e.g. backend/mock_server.py); $OPENROUTER_BASE_URL / $GROK_BASE_URL
+    # do the same per provider.
     "participants": {
         "DeepSeek": {
             "role": "cautious/skeptical → self-synthesis",
-            "generator": deepseek_generate,
-            "model": "deepseek/deepseek-r1"
+            "provider": "deepseek",
+            "model": "deepseek/deepseek-r1",
+            "fallback": {"model": "deepseek/deepseek-v3"},  # any participant keys to override
+            "enabled": True
         },
-        # "Grok": { ... }  # Disabled to avoid rate limit hell
+        "Grok": {
+            "role": "optimistic/synthesis",
+            "provider": "grok",
+            "model": "grok-beta",
+            "enabled": False  # Disabled to avoid rate limit hell
+        }
     }
 }
 
+def turn_spend(turn: Dict) -> Tuple[int, Optional[Dict], int]:
+    """
+    (total tokens, usage, replayed tokens) a logged turn cost. Best-of-N pays
+    for every finished candidate, not just the winner, so both totals come
+    from "sampling" when present - for live turns and resume replay alike.
+    """
+    sampling = turn.get("sampling")
+    if sampling:
+        return (sampling["tokens_all_candidates"],
+                sampling.get("usage_all_candidates", turn.get("usage")),
+                sampling.get("replayed_tokens_all_candidates", turn.get("replayed_tokens", 0)))
+    return turn.get("tokens_used", 0), turn.get("usage"), turn.get("replayed_tokens", 0)
+
+def log_file_for(stem: str) -> Path:
+    """Log path for a debate in CONFIG["output_dir"], with the suffix of CONFIG["log_format"]"""
+    suffix = ".jsonl" if CONFIG["log_format"] == "jsonl" else ".json"
+    return CONFIG["output_dir"] / f"mirror_max_{stem}{suffix}"
+
+# ────────────────────────────────────────────────
+# GENERATION
+# ────────────────────────────────────────────────
+
+async def generate_turn(
+    participant: Dict,
+    prompt: str,
+    echo: bool = True,
+    cache: Optional[ResponseCache] = None,
+    sample_index: int = 0,
+    on_delta: Optional[Callable[[str], None]] = None,
+    system: Optional[str] = None
+) -> Dict:
+    """
+    Run one completion for a participant. Streams deltas (printed if echo,
+    passed to on_delta if given) when CONFIG["stream"] is on and the
+    participant has a streamer.
+    With a cache, identical requests are served from disk; sample_index
+    keeps best-of-N samples of the same prompt apart in the cache.
+    system is the invariant prefix of the "prefix" prompt layout.
+    """
+    kwargs = {
+        "prompt": prompt,
+        "model": participant["model"],
+        "max_tokens": CONFIG["max_tokens"],
+        "temperature": CONFIG["temperature"]
+    }
+    if participant.get("base_url"):
+        kwargs["base_url"] = participant["base_url"]
+    if system is not None:
+        kwargs["system"] = system
+    
+    key = None
+    if cache is not None:
+        key = cache_key(participant["model"], prompt, CONFIG["temperature"],
+                        CONFIG["max_tokens"], CONFIG["cache"]["seed"] + sample_index, system=system)
+        start_time = time.time()
+        cached = cache.get(key)
+        if cached is not None:
+            if echo and CONFIG["stream"]:
+                print(cached["content"])
+            if on_delta:
+                on_delta(cached["content"])
+            # No provider spend this run; the original spend is reported as replayed_tokens
+            replay = {k: v for k, v in cached.items() if k != "hedge"}
+            return {**replay, "tokens_used": 0, "usage": {field: 0 for field in USAGE_FIELDS},
+                    "replayed_tokens": cached.get("tokens_used", 0),
+                    "latency_ms": (time.time() - start_time) * 1000, "cached": True}
+    
+    if participant.get("fallback") and CONFIG["hedging"]["enabled"]:
+        result = await _call_hedged(participant, kwargs, echo, on_delta)
+    else:
+        result = await _call_participant(participant, kwargs, echo, on_delta)
+    if cache is not None:
+        cache.put(key, participant["model"], result)
+    return result
+
+
+async def generate_best_turn(
+    participant: Dict,
+    prompt: str,
+    echo: bool = True,
+    cache: Optional[ResponseCache] = None,
+    on_delta: Optional[Callable[[str], None]] = None,
+    system: Optional[str] = None
+) -> Dict:
+    """generate_turn, or best-of-N concurrent sampling when CONFIG["best_of_n"]["n"] > 1"""
+    settings = CONFIG["best_of_n"]
+    if settings["n"] <= 1:
+        return await generate_turn(participant, prompt, echo=echo, cache=cache, on_delta=on_delta, system=system)
+    
+    # Candidates run silently; only the winner is shown
+    result = await best_of_n(
+        lambda i: generate_turn(participant, prompt, echo=False, cache=cache, sample_index=i, system=system),
+        n=settings["n"],
+        min_energy=settings["min_energy"],
+        required_tags=settings["required_tags"]
+    )
+    if echo and CONFIG["stream"]:
+        print(result["content"])
+    if on_delta:
+        on_delta(result["content"])
+    return result
+
+
+def _participant_functions(participant: Dict) -> Dict:
+    """Explicit generator/streamer on the participant win; otherwise load its provider"""
+    if "generator" in participant:
+        return {"generator": participant["generator"], "streamer": participant.get("streamer")}
+    return get_provider(participant["provider"])
+
+
+async def _call_participant(participant: Dict, kwargs: Dict, echo: bool,
+                            on_delta: Optional[Callable[[str], None]] = None,
+                            on_activity: Optional[Callable[[], None]] = None) -> Dict:
+    functions = _participant_functions(participant)
+    streamer = functions["streamer"]
+    if not (CONFIG["stream"] and streamer):
+        result = await functions["generator"](**kwargs)
+        result.setdefault("ttft_ms", None)
+        result.setdefault("tokens_per_sec", None)
+        return result
+    
+    result = None
+    async for event in streamer(**kwargs):
+        if event["type"] == "delta":
+            if echo:
+                print(event["content"], end="", flush=True)
+            if on_delta:
+                on_delta(event["content"])
+        elif event["type"] == "activity":
+            if on_activity:
+                on_activity()  # first chunk, possibly reasoning only (see api/streaming.py)
+        elif event["type"] == "done":
+            result = event
+    if echo:
+        print()
+    if result is None:
+        raise RuntimeError("Stream ended without a final event")
+    return result
+
+async def _call_hedged(participant: Dict, kwargs: Dict, echo: bool,
+                       on_delta: Optional[Callable[[str], None]] = None) -> Dict:
+    """Primary participant raced against its "fallback" (see core/hedging.py)"""
+    settings = CONFIG["hedging"]
+    backup = {k: v for k, v in participant.items() if k != "fallback"}
+    backup.update(participant["fallback"])
+    backup_kwargs = {k: v for k, v in kwargs.items() if k != "base_url"}
+    backup_kwargs["model"] = backup["model"]
+    if backup.get("base_url"):
+        backup_kwargs["base_url"] = backup["base_url"]
+    
+    streaming = CONFIG["stream"] and _participant_functions(participant)["streamer"] is not None
+    tracker = get_tracker(f"{participant['model']}|{'first_activity' if streaming else 'latency'}", settings["window"])
+    delay = hedge_delay(tracker, settings["percentile"], settings["min_samples"],
+                        settings["initial_delay"], settings["min_delay"], settings["censored_growth"])
+    printed = False
+    
+    def sink(text: str):
+        nonlocal printed
+        if echo:
+            print(text, end="", flush=True)
+            printed = True
+        if on_delta:
+            on_delta(text)
+    
+    result, hedge = await hedged_call(
+        lambda delta, activity: _call_participant(participant, kwargs, False, delta, activity),
+        lambda delta, activity: _call_participant(backup, backup_kwargs, False, delta, activity),
+        delay,
+        sink
+    )
+    if printed:
+        print()
+    # A censored sample only bounds the primary's latency from below; hedge_delay
+    # grows past such bounds until the primary is observed finishing again
+    if hedge["primary_ms"] is not None:
+        tracker.observe(hedge["primary_ms"], censored=hedge["primary_censored"])
+    
+    # The turn's latency is what the debate waited, not the winning request alone
+    result["model"] = backup["model"] if hedge["winner"] == "fallback" else participant["model"]
+    result["latency_ms"] = hedge.pop("wall_ms")
+    ttft_ms = hedge.pop("ttft_ms")
+    if result.get("ttft_ms") is not None and ttft_ms is not None:
+        result["ttft_ms"] = ttft_ms
+    result["hedge"] = hedge
+    return result
+
 # ────────────────────────────────────────────────
 # MAIN DEBATE LOOP
 # ────────────────────────────────────────────────
 
-async def run_debate():
+async def run_debate(
+    topic: Optional[str] = None,
+    output_file: Optional[Path] = None,
+    solution_file: Optional[Path] = None,
+    verbose: bool = True,
+    close_pools: bool = True,
+    resume_from: Optional[Path] = None,
+    on_event: Optional[Callable[[Dict], None]] = None
+) -> Dict:
+    """
+    Run one full debate and return its log. Concurrent callers (see batch.py)
+    pass distinct output files, verbose=False and close_pools=False.
+    With resume_from, turns already in that log are replayed into the context
+    and the debate continues at the next turn number.
+    on_event receives {"type": "delta", "round", "speaker", "content"} while a
+    turn streams and {"type": "turn", ...turn record} once it is logged
+    (see frontend/app.py).
+    """
+    previous = load_debate_log(resume_from) if resume_from is not None else None
+    if previous is not None:
+        topic = previous["config"].get("topic") or topic
+    topic = topic or CONFIG["topic"]
+    say = print if verbose else (lambda *args, **kwargs: None)
     context = ContextManager()
-    history: List[Dict] = []
     analyzer = DebateAnalyzer()
+    monitor = None
+    if CONFIG["convergence"]["enabled"]:
+        monitor = ConvergenceMonitor(**{k: v for k, v in CONFIG["convergence"].items() if k != "enabled"})
+    configure_pool(**CONFIG["http_pool"])
+    for provider, limits in CONFIG["rate_limits"].items():
+        configure_rate_limits(provider, **limits)
+    
+    cache = None
+    if CONFIG["cache"]["mode"] != "off":
+        cache = ResponseCache(
+            Path(CONFIG["cache"]["path"]),
+            mode=CONFIG["cache"]["mode"],
+            max_bytes=CONFIG["cache"]["max_bytes"]
+        )
     
     CONFIG["output_dir"].mkdir(exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = CONFIG["output_dir"] / f"mirror_max_{timestamp}.json"
+    if output_file is None and resume_from is not None and Path(resume_from).suffix == ".jsonl":
+        output_file = Path(resume_from)  # keep appending to the same per-turn checkpoint
+    if output_file is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_file = log_file_for(timestamp)
     
     config_for_log = {
         k: v for k, v in CONFIG.items()
         if k not in ["participants", "output_dir"]
     }
     config_for_log["participants"] = {
-        name: {"role": info["role"], "model": info.get("model", "unknown")}
+        name: {"role": info["role"], "model": info.get("model", "unknown"),
+               "provider": info.get("provider", "custom"),
+               "fallback_model": (info.get("fallback") or {}).get("model")}
         for name, info in CONFIG["participants"].items()
+        if info.get("enabled", True)
     }
     config_for_log["output_dir"] = str(CONFIG["output_dir"])
+    config_for_log["topic"] = topic
 
     debate_log = {
         "config": config_for_log,
@@ -80,97 +382,351 @@ async def run_debate():
         "turns": [],
         "metadata": {
             "total_tokens": 0,
+            "usage": {field: 0 for field in USAGE_FIELDS},
+            "replayed_tokens": 0,  # served from the response cache, not spent
             "total_latency_ms": 0.0,
             "avg_disagreement_energy": 0.0,
             "energy_history": []
         }
     }
     
-    print("\n" + "═" * 80)
-    print(f"Topic: {TOPIC}")
-    print(f"Participants: DeepSeek self-debate (cautious/skeptical → optimistic/synthesis)")
-    print(f"Max turns: {CONFIG['max_turns']} | Max tokens/response: {CONFIG['max_tokens']}")
-    print("═" * 80 + "\n")
+    def add_spend(turn: Dict):
+        tokens, usage, replayed = turn_spend(turn)
+        debate_log["metadata"]["total_tokens"] += tokens
+        for field in USAGE_FIELDS:
+            debate_log["metadata"]["usage"][field] += (usage or {}).get(field, 0)
+        debate_log["metadata"]["replayed_tokens"] += replayed
+    
+    # Persona definitions for the invariant prompt prefix
+    personas = {name: info["role"] for name, info in CONFIG["participants"].items() if info.get("enabled", True)}
     
     current_turn = 0
-    current_speaker = "DeepSeek"
+    turns_completed = 0
+    prior_turns: List[Dict] = []
+    if previous is not None:
+        prior_turns = previous["turns"]
+        for turn in prior_turns:
+            context.add_turn(turn["speaker"], turn["content"], turn["turn"], turn.get("sections"))
+            if monitor is not None:
+                monitor.observe(turn.get("disagreement_energy", 0.0), turn.get("cruxes", []))
+            add_spend(turn)
+            debate_log["metadata"]["total_latency_ms"] += turn.get("latency_ms", 0.0)
+            debate_log["metadata"]["energy_history"].append(turn.get("disagreement_energy", 0.0))
+        if prior_turns:
+            current_turn = prior_turns[-1]["turn"]
+            turns_completed = len(prior_turns)
+        debate_log["start_time"] = previous.get("start_time") or debate_log["start_time"]
+        debate_log["metadata"]["resumed_from"] = str(resume_from)
+        debate_log["metadata"]["resumed_at_turn"] = current_turn + 1
     
-    while current_turn < CONFIG["max_turns"]:
-        current_turn += 1
-        
-        # Alternate "personas" for self-debate
-        role = "cautious/skeptical" if current_turn % 2 == 1 else "optimistic/synthesis"
-        print(f"\nTURN {current_turn:02d} | DeepSeek ({role})")
-        print("─" * 70)
+    # jsonl: turns go straight to disk and are not kept in debate_log["turns"]
+    writer = None
+    if output_file.suffix == ".jsonl":
+        appending = previous is not None and output_file == Path(resume_from)
+        writer = DebateLogWriter(output_file, fsync_every=CONFIG["log_fsync_every"])
+        if appending:
+            writer.append_record({"type": "resume", "at_turn": current_turn + 1,
+                                  "time": datetime.now().isoformat()})
+        else:
+            writer.write_header(config_for_log, debate_log["start_time"])
+            for turn in prior_turns:
+                writer.append_turn(turn)
+    else:
+        debate_log["turns"].extend(prior_turns)
+    
+    rounds_mode = CONFIG["schedule"] == "rounds"
+    speakers = [name for name, info in CONFIG["participants"].items() if info.get("enabled", True)]
+    
+    say("\n" + "═" * 80)
+    say(f"Topic: {topic}")
+    if rounds_mode:
+        say(f"Participants: {', '.join(speakers)} (parallel rounds)")
+        say(f"Max rounds: {CONFIG['max_turns']} | Max tokens/response: {CONFIG['max_tokens']}")
+    else:
+        say(f"Participants: DeepSeek self-debate (cautious/skeptical → optimistic/synthesis)")
+        say(f"Max turns: {CONFIG['max_turns']} | Max tokens/response: {CONFIG['max_tokens']}")
+    if previous is not None:
+        say(f"Resuming from {resume_from} at turn {current_turn + 1} "
+            f"({turns_completed} turns, {debate_log['metadata']['total_tokens']} tokens already spent)")
+    say("═" * 80 + "\n")
+    
+    turn_timings: List[Dict] = []
+    
+    def build_prompt(speaker: str, opponent: str, turn_number: int, timer: TurnTimer,
+                     final: bool = False) -> Tuple[Optional[str], str]:
+        """(system, prompt) - system is None in the classic layout"""
+        with timer.span("prompt_build"):
+            system = None
+            if CONFIG["prompt_layout"] == "prefix":
+                system, prompt = get_turn_messages(
+                    context_manager=context,
+                    personas=personas,
+                    max_input_tokens=CONFIG["max_input_tokens"],
+                    current_speaker=speaker,
+                    opponent=opponent,
+                    turn_number=turn_number,
+                    topic=topic
+                )
+            else:
+                prompt = get_turn_prompt(
+                    history=None,
+                    context_manager=context,
+                    max_input_tokens=CONFIG["max_input_tokens"],
+                    current_speaker=speaker,
+                    opponent=opponent,
+                    turn_number=turn_number,
+                    topic=topic
+                )
+            
+            # Per-turn instructions always go at the very end, after the context
+            
+            if final:
+                prompt += ("\nThe debate has converged. This is the final turn: provide [Final Solution:] "
+                           "with the best agreed path forward and state any irreconcilable difference.")
+            # Force synthesis every 4 turns
+            elif turn_number % 4 == 0:
+                prompt += "\nThis is a synthesis turn. Provide [Final Solution:] with the best agreed path forward."
+        return system, prompt
+    
+    def record_turn(turn_number: int, round_number: int, speaker: str, role: str,
+                    prompt: Tuple[Optional[str], str], result: Dict, show_content: bool, timer: TurnTimer):
+        nonlocal turns_completed
+        content = result["content"].strip()
+        with timer.span("analyzer"):
+            sections = parse_sections(content)
+            energy = analyzer.calculate_disagreement_energy(content, context.history)
+            cruxes = analyzer.extract_crux_questions(content, sections)
+            novelty = monitor.observe(energy, cruxes) if monitor is not None else None
         
-        prompt = get_turn_prompt(
-            history=history,
-            current_speaker=current_speaker,
-            opponent="DeepSeek (alternate persona)",
-            turn_number=current_turn,
-            topic=CONFIG["topic"]
-        )
+        turn_data = {
+            "turn": turn_number,
+            "round": round_number,
+            "speaker": speaker,
+            "participant": speaker,
+            "model": result.get("model") or CONFIG["participants"][speaker].get("model"),
+            "role": role,
+            "content": content,
+            "prompt_tokens_est": sum(estimate_tokens(part) for part in prompt if part),
+            "tokens_used": result["tokens_used"],
+            "usage": result.get("usage"),
+            "latency_ms": result["latency_ms"],
+            "ttft_ms": result["ttft_ms"],
+            "tokens_per_sec": result["tokens_per_sec"],
+            "cached": result.get("cached", False),
+            "replayed_tokens": result.get("replayed_tokens", 0),
+            "sampling": result.get("sampling"),
+            "hedge": result.get("hedge"),
+            "disagreement_energy": round(energy, 3),
+            "cruxes": cruxes,
+            "sections": sections,
+            "crux_novelty": novelty,
+            "timing": timer.as_dict(),
+            "timestamp": datetime.now().isoformat()
+        }
         
-        # Force synthesis every 4 turns
-        if current_turn % 4 == 0:
-            prompt += "\nThis is a synthesis turn. Provide [Final Solution:] with the best agreed path forward."
+        with timer.span("log_write"):
+            if writer is not None:
+                writer.append_turn(turn_data)
+            else:
+                debate_log["turns"].append(turn_data)
+        turn_timings.append(timer.as_dict())
+        observe_turn(timer)
+        if on_event:
+            on_event({"type": "turn", **turn_data})
+        turns_completed += 1
+        context.add_turn(speaker, content, turn_number, sections)
         
-        generator = CONFIG["participants"][current_speaker]["generator"]
+        add_spend(turn_data)
+        debate_log["metadata"]["total_latency_ms"] += result["latency_ms"]
+        debate_log["metadata"]["energy_history"].append(energy)
         
-        print("Generating response...", end="", flush=True)
-        try:
-            result = await generator(
-                prompt=prompt,
-                max_tokens=CONFIG["max_tokens"],
-                temperature=CONFIG["temperature"]
-            )
-            print(" done ✓")
-            
-            content = result["content"].strip()
-            energy = analyzer.calculate_disagreement_energy(content, history)
-            cruxes = analyzer.extract_crux_questions(content)
-            
-            turn_data = {
-                "turn": current_turn,
-                "speaker": current_speaker,
-                "role": role,
-                "content": content,
-                "tokens_used": result["tokens_used"],
-                "latency_ms": result["latency_ms"],
-                "disagreement_energy": round(energy, 3),
-                "cruxes": cruxes,
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            debate_log["turns"].append(turn_data)
-            history.append({"turn": current_turn, "speaker": current_speaker, "content": content})
-            
-            debate_log["metadata"]["total_tokens"] += result["tokens_used"]
-            debate_log["metadata"]["total_latency_ms"] += result["latency_ms"]
-            debate_log["metadata"]["energy_history"].append(energy)
+        preview_len = 500
+        preview = content[:preview_len] + ("..." if len(content) > preview_len else "")
+        tokens = f"Tokens: {result['tokens_used']}"
+        if result.get("usage") and result["usage"]["cached_tokens"]:
+            tokens += f" ({result['usage']['cached_tokens']} prompt tokens cached)"
+        say(f"  Energy: {energy:.2f}  |  Cruxes: {len(cruxes)}  |  {tokens}")
+        timing = f"  Latency: {result['latency_ms']:.0f}ms"
+        if result["ttft_ms"] is not None:
+            timing += f"  |  TTFT: {result['ttft_ms']:.0f}ms  |  {result['tokens_per_sec']:.1f} tok/s"
+        if timer.retries:
+            timing += f"  |  Retries: {timer.retries}"
+        say(timing + "\n")
+        if show_content:
+            say(preview)
+        say("─" * 70)
+    
+    def delta_sink(round_number: int, speaker: str) -> Optional[Callable[[str], None]]:
+        if on_event is None:
+            return None
+        return lambda text: on_event({"type": "delta", "round": round_number, "speaker": speaker, "content": text})
+    
+    def check_convergence(last_turns: int) -> bool:
+        """True if a forced final turn should follow; sets stop details in metadata"""
+        nonlocal stop_converged
+        details = monitor.check() if monitor is not None else None
+        if details is None:
+            return False
+        details["at_turn"] = current_turn
+        debate_log["metadata"]["convergence"] = details
+        say(f"\nConverged after turn {current_turn}: {details['reason']}")
+        if all(turn["final_solution"] for turn in context.history[-last_turns:]):
+            stop_converged = True  # the last turn already gave a final solution
+            return False
+        say("Running one final synthesis turn.")
+        return True
+    
+    completed_all = False
+    stop_converged = False
+    cancelled = False
+    
+    try:
+        if rounds_mode:
+            # Every enabled participant answers the same context snapshot concurrently;
+            # answers are merged (in participant order) before the next round starts.
+            current_round = prior_turns[-1].get("round", prior_turns[-1]["turn"]) if prior_turns else 0
+            final_round = False
             
-            preview_len = 500
-            preview = content[:preview_len] + ("..." if len(content) > preview_len else "")
-            print(f"  Energy: {energy:.2f}  |  Cruxes: {len(cruxes)}  |  Tokens: {result['tokens_used']}")
-            print(f"  Latency: {result['latency_ms']:.0f}ms\n")
-            print(preview)
-            print("─" * 70)
+            while current_round < CONFIG["max_turns"] and not stop_converged:
+                current_round += 1
+                say(f"\nROUND {current_round:02d} | {', '.join(speakers)}" + (" | final synthesis" if final_round else ""))
+                say("═" * 70)
+                
+                prompts = {}
+                timers = {name: TurnTimer() for name in speakers}
+                for name in speakers:
+                    others = [other for other in speakers if other != name]
+                    opponent = ", ".join(others) if others else f"{name} (alternate persona)"
+                    prompts[name] = build_prompt(name, opponent, current_round, timers[name], final=final_round)
+                
+                outcomes = await asyncio.gather(
+                    *(run_timed(timers[name], generate_best_turn(CONFIG["participants"][name], prompts[name][1],
+                                                                 echo=False, cache=cache,
+                                                                 on_delta=delta_sink(current_round, name),
+                                                                 system=prompts[name][0]))
+                      for name in speakers),
+                    return_exceptions=True
+                )
+                
+                errors = []
+                for name, outcome in zip(speakers, outcomes):
+                    if isinstance(outcome, BaseException):
+                        errors.append(f"{name}: {outcome}")
+                        continue
+                    current_turn += 1
+                    say(f"\nTURN {current_turn:02d} | {name} ({CONFIG['participants'][name]['role']})")
+                    say("─" * 70)
+                    record_turn(current_turn, current_round, name, CONFIG["participants"][name]["role"],
+                                prompts[name], outcome, show_content=True, timer=timers[name])
+                
+                if errors:
+                    print(f"\nERROR during round {current_round}: {'; '.join(errors)}")
+                    debate_log["metadata"]["error"] = f"round {current_round}: {'; '.join(errors)}"
+                    break
+                if final_round:
+                    stop_converged = True
+                else:
+                    final_round = check_convergence(len(speakers))
+            else:
+                completed_all = True
+        else:
+            current_speaker = "DeepSeek"
+            final_turn = False
             
-        except Exception as e:
-            print(f"\nERROR during turn {current_turn}: {str(e)}")
-            break
+            while current_turn < CONFIG["max_turns"] and not stop_converged:
+                current_turn += 1
+                
+                # Alternate "personas" for self-debate
+                role = "cautious/skeptical" if current_turn % 2 == 1 else "optimistic/synthesis"
+                say(f"\nTURN {current_turn:02d} | DeepSeek ({role})" + (" | final synthesis" if final_turn else ""))
+                say("─" * 70)
+                
+                timer = TurnTimer()
+                prompt = build_prompt(current_speaker, "DeepSeek (alternate persona)", current_turn, timer,
+                                      final=final_turn)
+                participant = CONFIG["participants"][current_speaker]
+                
+                if CONFIG["stream"] and verbose:
+                    say("Streaming response:\n")
+                else:
+                    say("Generating response...", end="", flush=True)
+                try:
+                    result = await run_timed(timer, generate_best_turn(participant, prompt[1], echo=verbose, cache=cache,
+                                                                       on_delta=delta_sink(current_turn, current_speaker),
+                                                                       system=prompt[0]))
+                    say(" done ✓")
+                    record_turn(current_turn, current_turn, current_speaker, role, prompt, result,
+                                show_content=not CONFIG["stream"], timer=timer)
+                
+                except Exception as e:
+                    print(f"\nERROR during turn {current_turn}: {str(e)}")
+                    debate_log["metadata"]["error"] = f"turn {current_turn}: {str(e)}"
+                    break
+                if final_turn:
+                    stop_converged = True
+                else:
+                    final_turn = check_convergence(1)
+            else:
+                completed_all = True
+    except asyncio.CancelledError:
+        # DELETE /debates/{id} or server shutdown: the log is still closed below
+        cancelled = True
+        raise
+    except BaseException as e:
+        debate_log["metadata"].setdefault("error", f"turn {current_turn}: {e!r}")
+        raise
+    finally:
+        # ────────────────────────────────────────────────
+        # FINALIZE LOG
+        # ────────────────────────────────────────────────
+        
+        debate_log["end_time"] = datetime.now().isoformat()
+        if cancelled:
+            debate_log["metadata"]["stop_reason"] = "cancelled"
+        elif "error" in debate_log["metadata"]:
+            debate_log["metadata"]["stop_reason"] = "error"
+        elif stop_converged:
+            debate_log["metadata"]["stop_reason"] = "converged"
+            completed_all = True
+        else:
+            debate_log["metadata"]["stop_reason"] = "max_turns"
+        if cache is not None:
+            debate_log["metadata"]["cache"] = dict(cache.stats)
+            cache.close()
+        if debate_log["metadata"]["energy_history"]:
+            debate_log["metadata"]["avg_disagreement_energy"] = round(
+                sum(debate_log["metadata"]["energy_history"]) / len(debate_log["metadata"]["energy_history"]),
+                3
+            )
+        debate_log["metadata"]["timing"] = summarize(turn_timings)
+        if CONFIG["metrics_file"]:
+            write_prometheus(Path(CONFIG["metrics_file"]))
+        
+        if writer is not None:
+            writer.write_footer(debate_log["metadata"], debate_log["end_time"])
+            writer.close()
+        else:
+            save_debate_log(debate_log, output_file)
+        
+        # Release pooled provider connections, also after an error or cancellation
+        if close_pools:
+            await close_sessions()
+    
+    if writer is not None:
+        # Off the event loop - other debates keep streaming while the log is re-read
+        debate_log = await asyncio.to_thread(load_debate_log, output_file)
     
     # ────────────────────────────────────────────────
     # IMPROVED SOLUTION EXTRACTION & DESKTOP FILE
     # ────────────────────────────────────────────────
     
-    print("\n" + "═" * 80)
-    print("GENERATING FINAL SOLUTION FILE")
-    print("═" * 80)
+    say("\n" + "═" * 80)
+    say("GENERATING FINAL SOLUTION FILE")
+    say("═" * 80)
     
     solution_text = f"Mirror Max Debate - Final Solution\n"
     solution_text += "=" * 60 + "\n\n"
-    solution_text += f"Topic: {TOPIC}\n\n"
+    solution_text += f"Topic: {topic}\n\n"
     
     solution_text += "Key Arguments Summary:\n"
     solution_text += "-" * 50 + "\n"
@@ -183,51 +739,157 @@ async def run_debate():
     solution_text += "-" * 50 + "\n"
     
     best_solution = "No clear final solution reached (debate incomplete)."
-    for turn in reversed(debate_log["turns"]):
-        content = turn["content"]
-        if "[Final Solution:]" in content or "[Synthesis Attempt:]" in content:
-            start = content.find("[Final Solution:]") + len("[Final Solution:]") if "[Final Solution:]" in content else content.find("[Synthesis Attempt:]") + len("[Synthesis Attempt:]")
-            end = content.find("[", start) if "[" in content[start:] else len(content)
-            best_solution = content[start:end].strip()
-            break
-        elif "best" in content.lower() or "recommended" in content.lower() or "solution" in content.lower():
-            best_solution = content.strip()
-            break
+    if context.latest_synthesis is not None:
+        # Tracked as turns were added - no rescan of the log
+        best_solution = first_section(context.latest_synthesis["sections"], "final_solution", "synthesis")
+    else:
+        for turn in reversed(debate_log["turns"]):
+            content = turn["content"]
+            if "best" in content.lower() or "recommended" in content.lower() or "solution" in content.lower():
+                best_solution = content.strip()
+                break
     
     if not best_solution.strip() and debate_log["turns"]:
         best_solution = debate_log["turns"][-1]["content"].strip()
     
     solution_text += best_solution + "\n\n"
     
-    if len(debate_log["turns"]) < CONFIG["max_turns"]:
+    if not completed_all:
         solution_text += "Note: Debate stopped early (e.g. rate limit). This is the strongest/best available conclusion so far.\n"
     
     solution_text += f"\nGenerated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} SAST\n"
     solution_text += f"Full detailed log: {output_file}\n"
     
-    # Save to Desktop/solution.txt
-    desktop_path = Path.home() / "Desktop" / "solution.txt"
-    with open(desktop_path, "w", encoding="utf-8") as f:
+    # Save to Desktop/solution.txt unless the caller chose a location
+    if solution_file is None:
+        solution_file = Path.home() / "Desktop" / "solution.txt"
+    solution_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(solution_file, "w", encoding="utf-8") as f:
         f.write(solution_text)
     
-    print(f"Solution file created/updated: ~/Desktop/solution.txt")
-    print("Open it with: cat ~/Desktop/solution.txt  or any text editor")
+    say(f"Solution file created/updated: {solution_file}")
+    say(f"Open it with: cat {solution_file}  or any text editor")
     
-    # Also save JSON log
-    debate_log["end_time"] = datetime.now().isoformat()
-    if debate_log["metadata"]["energy_history"]:
-        debate_log["metadata"]["avg_disagreement_energy"] = round(
-            sum(debate_log["metadata"]["energy_history"]) / len(debate_log["metadata"]["energy_history"]),
-            3
-        )
+    say("\nFull log saved to:", output_file)
+    say(f"Total tokens used: {debate_log['metadata']['total_tokens']}")
+    if debate_log["metadata"].get("replayed_tokens"):
+        say(f"Tokens replayed from the response cache: {debate_log['metadata']['replayed_tokens']}")
+    usage = debate_log["metadata"].get("usage")
+    if usage and usage["prompt_tokens"]:
+        say(f"Prompt tokens served from provider cache: {usage['cached_tokens']}/{usage['prompt_tokens']} "
+            f"({usage['cached_tokens'] / usage['prompt_tokens']:.0%})")
+    say(f"Average disagreement energy: {debate_log['metadata']['avg_disagreement_energy']:.2f}")
+    say(f"Stopped: {debate_log['metadata']['stop_reason']}")
+    say("═" * 80)
     
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(debate_log, f, indent=2, ensure_ascii=False)
+    return debate_log
+
+# ────────────────────────────────────────────────
+# CLI / CONFIG FILE
+# ────────────────────────────────────────────────
+
+def load_config_file(path: Path) -> None:
+    """
+    Merge a JSON (or YAML, if PyYAML is installed) config file into CONFIG.
+    Nested sections (participants, cache, http_pool, ...) are merged key by key.
+    """
+    path = Path(path)
+    with open(path, "r", encoding="utf-8") as f:
+        if path.suffix in (".yaml", ".yml"):
+            import yaml  # optional - only needed for YAML configs
+            overrides = yaml.safe_load(f) or {}
+        else:
+            overrides = json.load(f)
     
-    print("\nFull JSON log saved to:", output_file)
-    print(f"Total tokens used: {debate_log['metadata']['total_tokens']}")
-    print(f"Average disagreement energy: {debate_log['metadata']['avg_disagreement_energy']:.2f}")
-    print("═" * 80)
+    unknown = set(overrides) - set(CONFIG)
+    if unknown:
+        raise ValueError(f"Unknown config key(s) in {path}: {', '.join(sorted(unknown))}")
+    for key, value in overrides.items():
+        if key == "participants":
+            for name, spec in value.items():
+                CONFIG["participants"].setdefault(name, {}).update(spec)
+        elif isinstance(CONFIG[key], dict) and isinstance(value, dict):
+            CONFIG[key].update(value)
+        elif key == "output_dir":
+            CONFIG[key] = Path(value)
+        else:
+            CONFIG[key] = value
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Mirror Max debate engine")
+    parser.add_argument("topic", nargs="?", help="debate topic (prompted for interactively if omitted)")
+    parser.add_argument("--config", type=Path, help="JSON/YAML file merged into CONFIG")
+    parser.add_argument("--turns", type=int, help="max turns")
+    parser.add_argument("--model", help="model for every enabled participant")
+    parser.add_argument("--output-dir", type=Path, help="where logs are written")
+    parser.add_argument("--schedule", choices=["alternating", "rounds"],
+                        help="alternating self-debate, or parallel rounds across enabled participants")
+    parser.add_argument("--no-stream", action="store_true", help="wait for whole completions")
+    parser.add_argument("--non-interactive", "-y", action="store_true",
+                        help="never prompt; use the config/default topic")
+    parser.add_argument("--resume", type=Path, metavar="LOG",
+                        help="continue a previous mirror_max_*.json / .jsonl log from its next turn")
+    parser.add_argument("--print-config", action="store_true", help="print the effective config and exit")
+    return parser
+
+
+def apply_cli_args(args: argparse.Namespace) -> None:
+    """Config file first, then explicit flags on top"""
+    if args.config:
+        load_config_file(args.config)
+    if args.turns is not None:
+        CONFIG["max_turns"] = args.turns
+    if args.model:
+        for info in CONFIG["participants"].values():
+            if info.get("enabled", True):
+                info["model"] = args.model
+    if args.output_dir:
+        CONFIG["output_dir"] = args.output_dir
+    if args.schedule:
+        CONFIG["schedule"] = args.schedule
+    if args.no_stream:
+        CONFIG["stream"] = False
+    if getattr(args, "topic", None):
+        CONFIG["topic"] = args.topic
+
+
+def prompt_topic() -> str:
+    """Interactive topic prompt (terminal mode only)"""
+    print("\n" + "═" * 80)
+    print("MIRROR MAX v0.1 - Cognitive Differential Engine")
+    print("Enter your debate topic below (press Enter for default)")
+    custom_topic = input("Topic: ").strip()
+    
+    if custom_topic:
+        print(f"Using custom topic: {custom_topic}")
+        return custom_topic
+    print("Using default topic.")
+    return DEFAULT_TOPIC
+
+
+def main():
+    args = build_arg_parser().parse_args()
+    apply_cli_args(args)
+    # Provider retry notices (api/*_client.py) are logged, shown on the terminal only here
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
+    if args.print_config:
+        printable = {k: v for k, v in CONFIG.items() if k != "output_dir"}
+        printable["output_dir"] = str(CONFIG["output_dir"])
+        print(json.dumps(printable, indent=2, ensure_ascii=False, default=str))
+        return
+    
+    if args.resume:
+        asyncio.run(run_debate(resume_from=args.resume))
+        return
+    
+    # Prompt only when nothing chose a topic and a human is at the terminal
+    topic = CONFIG["topic"]
+    if not args.topic and topic == DEFAULT_TOPIC and not args.non_interactive and sys.stdin.isatty():
+        topic = prompt_topic()
+    asyncio.run(run_debate(topic=topic))
+
 
 if __name__ == "__main__":
-    asyncio.run(run_debate())
+    main()
@@ -0,0 +1,222 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, Optional
+
+# ────────────────────────────────────────────────
+# MOCK LLM SERVER
+# Minimal OpenAI-compatible POST /chat/completions (JSON or SSE stream),
+# stdlib only, HTTP/1.1 keep-alive. Latency, token rate, errors and 429s
+# are configurable so the engine can be exercised offline.
+#   python backend/mock_server.py --port 8008 --latency-ms 400 --rate-429 0.05
+# Point a participant at it with "base_url": "http://127.0.0.1:8008/v1".
+# Like provider prompt caching, leading messages already seen in an earlier
+# request are reported as usage.prompt_tokens_details.cached_tokens.
+# ────────────────────────────────────────────────
+
+MOCK_DEFAULTS = {
+    "latency_ms": 300.0,        # median time before the first byte
+    "latency_dist": "lognormal",  # fixed | uniform | lognormal
+    "latency_sigma": 0.5,       # lognormal shape / uniform half-width as a fraction
+    "tokens_per_sec": 80.0,     # completion speed once generating
+    "completion_tokens": 300,
+    "error_rate": 0.0,          # fraction of requests answered with 500
+    "rate_429": 0.0,            # fraction of requests answered with 429
+    "retry_after": 0.5,         # seconds, sent with every 429
+    "slow_rate": 0.0,           # fraction of requests stuck for slow_ms first
+    "slow_ms": 10000.0,
+    "seed": None,
+}
+
+_WORDS = ("however the evidence suggests alignment failure modes depend on incentives "
+          "and oversight yet scaling trends challenge that assumption because capability "
+          "gains outpace evaluation").split()
+
+
+class MockLLM:
+    def __init__(self, **options):
+        self.options = {**MOCK_DEFAULTS, **options}
+        self.random = random.Random(self.options["seed"])
+        self.stats = {"requests": 0, "errors": 0, "throttled": 0, "slow": 0}
+        self.prefixes = set()  # hashes of leading message runs seen so far
+
+    # ── behaviour ─────────────────────────────────
+
+    def _first_byte_delay(self) -> float:
+        median = self.options["latency_ms"] / 1000
+        sigma = self.options["latency_sigma"]
+        dist = self.options["latency_dist"]
+        if dist == "fixed":
+            delay = median
+        elif dist == "uniform":
+            delay = self.random.uniform(median * (1 - sigma), median * (1 + sigma))
+        else:
+            delay = self.random.lognormvariate(0, sigma) * median
+        if self.random.random() < self.options["slow_rate"]:
+            self.stats["slow"] += 1
+            delay += self.options["slow_ms"] / 1000
+        return max(0.0, delay)
+
+    def _cached_chars(self, messages) -> int:
+        """Length of the longest run of leading messages (all but the last) seen before"""
+        cached, chars, key = 0, 0, ()
+        for message in messages[:-1]:
+            key = (key, message.get("role"), message.get("content", ""))
+            chars += len(message.get("content", ""))
+            digest = hash(key)
+            if digest in self.prefixes:
+                cached = chars
+            self.prefixes.add(digest)
+        return cached
+
+    def _completion_words(self, n: int):
+        words = [self.random.choice(_WORDS) for _ in range(n)]
+        # Protocol tags so the analyzer has something to score
+        third = max(1, n // 3)
+        words.insert(0, "[Reference:]")
+        words.insert(third, "\n[Claim:]")
+        words.insert(2 * third, "\n[Crux-Question:]")
+        return words
+
+    # ── HTTP plumbing ─────────────────────────────
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                if method != "POST" or not path.rstrip("/").endswith("/chat/completions"):
+                    await self._send_json(writer, 404, {"error": {"message": f"no route {method} {path}"}})
+                else:
+                    await self._chat(writer, json.loads(body or b"{}"))
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _send_json(self, writer, status: int, payload: Dict, extra: Optional[Dict] = None):
+        body = json.dumps(payload).encode()
+        reason = {200: "OK", 404: "Not Found", 429: "Too Many Requests", 500: "Internal Server Error"}[status]
+        head = [f"HTTP/1.1 {status} {reason}", "Content-Type: application/json",
+                f"Content-Length: {len(body)}", "Connection: keep-alive"]
+        head += [f"{k}: {v}" for k, v in (extra or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+        await writer.drain()
+
+    async def _chat(self, writer, request: Dict):
+        self.stats["requests"] += 1
+        roll = self.random.random()
+        if roll < self.options["rate_429"]:
+            self.stats["throttled"] += 1
+            await self._send_json(writer, 429, {"error": {"message": "mock rate limit"}},
+                                  {"Retry-After": str(self.options["retry_after"])})
+            return
+        if roll < self.options["rate_429"] + self.options["error_rate"]:
+            self.stats["errors"] += 1
+            await self._send_json(writer, 500, {"error": {"message": "mock server error"}})
+            return
+
+        messages = request.get("messages", [])
+        prompt_chars = sum(len(m.get("content", "")) for m in messages)
+        n_tokens = min(int(request.get("max_tokens", 1024)), self.options["completion_tokens"])
+        usage = {"prompt_tokens": prompt_chars // 4, "completion_tokens": n_tokens,
+                 "total_tokens": prompt_chars // 4 + n_tokens,
+                 "prompt_tokens_details": {"cached_tokens": self._cached_chars(messages) // 4}}
+        words = self._completion_words(n_tokens)
+        per_token = 1.0 / self.options["tokens_per_sec"] if self.options["tokens_per_sec"] > 0 else 0.0
+
+        await asyncio.sleep(self._first_byte_delay())
+
+        if not request.get("stream"):
+            await asyncio.sleep(per_token * n_tokens)
+            await self._send_json(writer, 200, {
+                "id": f"mock-{self.stats['requests']}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)},
+                             "finish_reason": "stop"}],
+                "usage": usage
+            })
+            return
+
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Transfer-Encoding: chunked\r\nConnection: keep-alive\r\n\r\n")
+
+        async def send_event(data: str):
+            chunk = f"data: {data}\n\n".encode()
+            writer.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            await writer.drain()
+
+        for i, word in enumerate(words):
+            delta = {"choices": [{"index": 0, "delta": {"content": (" " if i else "") + word}}]}
+            await send_event(json.dumps(delta))
+            if per_token:
+                await asyncio.sleep(per_token)
+        await send_event(json.dumps({"choices": [], "usage": usage}))
+        await send_event("[DONE]")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+async def start_mock_server(host: str = "127.0.0.1", port: int = 0, **options):
+    """Start a MockLLM server on the running loop; returns (server, mock, base_url)"""
+    mock = MockLLM(**options)
+    server = await asyncio.start_server(mock.handle, host, port)
+    bound_port = server.sockets[0].getsockname()[1]
+    return server, mock, f"http://{host}:{bound_port}/v1"
+
+
+def serve_forever(host: str, port: int, options: Dict, ready=None):
+    """Blocking entry point (also used as a multiprocessing target by bench.py)"""
+    async def run():
+        server, mock, base_url = await start_mock_server(host, port, **options)
+        if ready is not None:
+            ready.put(base_url)
+        else:
+            print(f"Mock LLM listening on {base_url}")
+        async with server:
+            await server.serve_forever()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser):
+    for key, default in MOCK_DEFAULTS.items():
+        flag = "--" + key.replace("_", "-")
+        if key == "latency_dist":
+            parser.add_argument(flag, default=default, choices=["fixed", "uniform", "lognormal"])
+        elif key == "seed":
+            parser.add_argument(flag, type=int, default=default)
+        else:
+            parser.add_argument(flag, type=type(default), default=default)
+
+
+def mock_options(args: argparse.Namespace) -> Dict:
+    return {key: getattr(args, key) for key in MOCK_DEFAULTS}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8008)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+    serve_forever(args.host, args.port, mock_options(args))
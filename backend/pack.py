@@ -0,0 +1,95 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from core.logpack import LogPack
+from core.logstore import load_debate_log, save_debate_log
+
+# ────────────────────────────────────────────────
+# DEBATE PACK CLI
+# Move mirror_max_*.json / .jsonl logs into a compressed pack and read
+# single debates or turns back out (see core/logpack.py).
+#   python backend/pack.py add logs/archive.jsonl.gz logs [--remove]
+#   python backend/pack.py list logs/archive.jsonl.gz
+#   python backend/pack.py show logs/archive.jsonl.gz mirror_max_<stamp> [--turn 3] [-o out.jsonl]
+# Packed debates also load anywhere a log path is accepted as
+# "logs/archive.jsonl.gz#mirror_max_<stamp>" (e.g. rescore.py, --resume).
+# ────────────────────────────────────────────────
+
+
+def find_logs(paths):
+    for path in paths:
+        if path.is_dir():
+            yield from (p for p in sorted(path.glob("mirror_max_*.json*")) if p.suffix in (".json", ".jsonl"))
+        else:
+            yield path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compressed archive packs for Mirror Max debate logs")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    add = sub.add_parser("add", help="pack logs that are not in the pack yet")
+    add.add_argument("pack", type=Path, help="pack file (.jsonl.gz, or .jsonl.zst with zstandard installed)")
+    add.add_argument("paths", nargs="*", type=Path, default=[Path("logs")])
+    add.add_argument("--level", type=int, help="compression level (default 6)")
+    add.add_argument("--remove", action="store_true", help="delete the logs packed by this run")
+
+    listing = sub.add_parser("list", help="debates in a pack")
+    listing.add_argument("pack", type=Path)
+
+    show = sub.add_parser("show", help="print one packed debate or turn")
+    show.add_argument("pack", type=Path)
+    show.add_argument("key")
+    show.add_argument("--turn", type=int, help="only the n-th turn (1-based)")
+    show.add_argument("-o", "--output", type=Path, help="write the debate to a .json / .jsonl log instead")
+    args = parser.parse_args()
+
+    if args.command == "add":
+        start = time.perf_counter()
+        added = skipped = 0
+        packed = []  # files whose debate is now safely in the pack
+        with LogPack(args.pack, mode="a", level=args.level) as pack:
+            for file in find_logs(args.paths):
+                if file.stem in pack:
+                    skipped += 1
+                    continue
+                try:
+                    pack.add(file.stem, load_debate_log(file))
+                except (OSError, ValueError) as e:
+                    print(f"  ! {file}: {e}", file=sys.stderr)
+                    continue
+                added += 1
+                packed.append(file)
+            pack.flush()
+            size = pack.size
+        if args.remove:
+            for file in packed:
+                file.unlink()
+        print(f"Packed {added} logs ({skipped} already packed) into {args.pack} "
+              f"[{size / 1024:.0f} KiB] in {time.perf_counter() - start:.2f}s")
+
+    elif args.command == "list":
+        with LogPack(args.pack) as pack:
+            for key, entry in pack.debates.items():
+                status = "done" if entry["footer"] else "incomplete"
+                print(f"{key}  {len(entry['turns']):>3} turns  {status:<10}  {(entry['topic'] or '')[:70]}")
+            print(f"\n{len(pack)} debate(s)")
+
+    elif args.command == "show":
+        with LogPack(args.pack) as pack:
+            if args.turn is not None:
+                record = pack.load_turn(args.key, args.turn - 1)
+            else:
+                record = pack.load(args.key)
+        if args.output and args.turn is None:
+            save_debate_log(record, args.output)
+            print(f"Wrote {args.output}")
+        else:
+            print(json.dumps(record, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+from core.analyzer import DebateAnalyzer
+from core.logpack import is_pack, open_pack
+from core.logstore import PACK_SEPARATOR, load_debate_log, save_debate_log
+
+# ────────────────────────────────────────────────
+# OFFLINE RE-SCORER
+# Re-run DebateAnalyzer over every turn of every saved debate log, one
+# file per task across a process pool.
+#   python backend/rescore.py                 # report only
+#   python backend/rescore.py logs --write    # update logs in place
+# Packs (logs/*.jsonl.gz) are re-scored per debate, report only.
+# ────────────────────────────────────────────────
+
+
+def rescore_file(path: str, write: bool = False) -> Dict:
+    """Re-score one mirror_max_*.json / .jsonl file or "pack#key"; returns a per-file summary"""
+    try:
+        log = load_debate_log(Path(path))
+    except (OSError, json.JSONDecodeError) as e:
+        return {"file": path, "error": str(e)}
+
+    turns = log.get("turns", [])
+    old_energy, new_energy = [], []
+    for turn in turns:
+        scored = DebateAnalyzer.score_turn(turn.get("content", ""))
+        old_energy.append(turn.get("disagreement_energy", 0.0))
+        new_energy.append(scored["disagreement_energy"])
+        turn.update(scored)
+
+    if write and turns:
+        metadata = log.setdefault("metadata", {})
+        metadata["energy_history"] = new_energy
+        metadata["avg_disagreement_energy"] = round(sum(new_energy) / len(new_energy), 3)
+        save_debate_log(log, Path(path))
+
+    return {
+        "file": path,
+        "turns": len(turns),
+        "old_avg": round(sum(old_energy) / len(old_energy), 3) if turns else None,
+        "new_avg": round(sum(new_energy) / len(new_energy), 3) if turns else None,
+    }
+
+
+def find_logs(paths: List[Path]) -> List[str]:
+    files = []
+    for path in paths:
+        if path.is_dir():
+            files.extend(str(p) for p in sorted(path.glob("mirror_max_*.json*")) if p.suffix in (".json", ".jsonl"))
+            for pack in sorted(path.glob("*.jsonl.*")):
+                if is_pack(pack):
+                    files.extend(_packed(pack))
+        elif is_pack(path):
+            files.extend(_packed(path))
+        else:
+            files.append(str(path))
+    return files
+
+
+def _packed(pack: Path) -> List[str]:
+    return [f"{pack}{PACK_SEPARATOR}{key}" for key in open_pack(pack).keys()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score saved Mirror Max debate logs")
+    parser.add_argument("paths", nargs="*", type=Path, default=[Path("logs")],
+                        help="log files or directories (default: logs/)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--write", action="store_true", help="write new scores back into the logs")
+    parser.add_argument("--report", type=Path, help="write per-file summaries as JSONL")
+    args = parser.parse_args()
+
+    files = find_logs(args.paths)
+    if not files:
+        raise SystemExit("No debate logs found")
+    if args.write and any(PACK_SEPARATOR in f for f in files):
+        raise SystemExit("--write cannot update packed logs - unpack them first (backend/pack.py show -o)")
+
+    start = time.time()
+    chunksize = max(1, len(files) // (args.workers * 8))
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(rescore_file, files, [args.write] * len(files), chunksize=chunksize))
+    elapsed = time.time() - start
+
+    scored = [r for r in results if "error" not in r]
+    errors = [r for r in results if "error" in r]
+    total_turns = sum(r["turns"] for r in scored)
+    changed = sum(1 for r in scored if r["old_avg"] != r["new_avg"])
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            for r in results:
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+
+    for r in errors:
+        print(f"  ! {r['file']}: {r['error']}")
+    print(f"Re-scored {total_turns} turns in {len(scored)} logs "
+          f"({changed} changed average, {len(errors)} unreadable) in {elapsed:.1f}s "
+          f"with {args.workers} workers")
+    if args.write:
+        print("Logs updated in place.")
+
+
+if __name__ == "__main__":
+    main()
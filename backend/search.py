@@ -0,0 +1,81 @@
+import argparse
+import json
+import time
+from pathlib import Path
+
+from core.archive import DebateArchive
+
+# ────────────────────────────────────────────────
+# DEBATE ARCHIVE CLI
+# Incrementally index logs/ into SQLite FTS5, then query it.
+#   python backend/search.py index logs
+#   python backend/search.py query "deceptive alignment" --in cruxes --min-energy 0.5
+# Queries use FTS5 syntax (AND / OR / NOT, "phrases", prefix*); `query`
+# re-indexes first unless --no-refresh is given.
+# ────────────────────────────────────────────────
+
+DEFAULT_DB = Path("logs/.index/debates.sqlite3")
+
+
+def print_results(results, elapsed_ms: float):
+    for i, r in enumerate(results, 1):
+        print(f"{i:>3}. [{-r['score']:.2f}] {Path(r['path']).name}  turn {r['turn']} | {r['speaker']} "
+              f"| {r['model']} | energy {r['energy']:.2f} | {r['tokens']} tok")
+        print(f"     topic: {(r['topic'] or '')[:90]}")
+        print(f"     {' '.join(r['snippet'].split())}")
+    print(f"\n{len(results)} result(s) in {elapsed_ms:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index and search Mirror Max debate logs")
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB, help=f"index file (default: {DEFAULT_DB})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    index = sub.add_parser("index", help="ingest new / changed logs")
+    index.add_argument("paths", nargs="*", type=Path, default=[Path("logs")])
+    index.add_argument("--no-prune", action="store_true", help="keep entries for deleted files")
+
+    query = sub.add_parser("query", help="ranked full-text search over turns and cruxes")
+    query.add_argument("text", help="FTS5 query")
+    query.add_argument("--in", dest="column", choices=["content", "cruxes", "topic"], help="match one column only")
+    query.add_argument("--limit", type=int, default=20)
+    query.add_argument("--min-energy", type=float)
+    query.add_argument("--model", help="substring of the model name")
+    query.add_argument("--topic", help="substring of the debate topic")
+    query.add_argument("--per-debate", action="store_true", help="best turn per debate only")
+    query.add_argument("--paths", nargs="*", type=Path, default=[Path("logs")], help="dirs to refresh first")
+    query.add_argument("--no-refresh", action="store_true", help="skip the incremental re-index")
+    query.add_argument("--json", action="store_true", help="print results as JSON")
+
+    sub.add_parser("stats", help="index totals")
+    args = parser.parse_args()
+
+    archive = DebateArchive(args.db)
+    try:
+        if args.command == "index":
+            start = time.perf_counter()
+            stats = archive.ingest(args.paths, prune=not args.no_prune)
+            print(f"Scanned {stats['scanned']} logs in {time.perf_counter() - start:.2f}s: "
+                  f"{stats['indexed']} indexed, {stats['unchanged'] + stats['touched']} unchanged, "
+                  f"{stats['removed']} removed, {stats['errors']} unreadable")
+        elif args.command == "query":
+            if not args.no_refresh:
+                archive.ingest([p for p in args.paths if p.exists()])
+            start = time.perf_counter()
+            results = archive.search(args.text, limit=args.limit, column=args.column,
+                                     min_energy=args.min_energy, model=args.model,
+                                     topic=args.topic, per_debate=args.per_debate)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if args.json:
+                print(json.dumps(results, indent=2, ensure_ascii=False))
+            else:
+                print_results(results, elapsed_ms)
+        else:
+            stats = archive.stats()
+            print(f"{stats['debates']} debates, {stats['turns']} turns, {stats['total_tokens']} tokens indexed")
+    finally:
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+# backend/ modules import each other by bare name (core.*, api.*, main)
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from main import CONFIG, run_debate, log_file_for, load_config_file  # noqa: E402
+from core.logstore import load_debate_log  # noqa: E402
+from api.session import close_sessions  # noqa: E402
+from api.timing import render_prometheus  # noqa: E402
+
+# ────────────────────────────────────────────────
+# DEBATE SERVER
+# Many debates on one event loop, driven over HTTP:
+#   POST   /debates               {"topic": "..."}  -> start
+#   GET    /debates               list
+#   GET    /debates/{id}          status + metadata
+#   GET    /debates/{id}/log      full debate log
+#   DELETE /debates/{id}          cancel
+#   WS     /debates/{id}/ws       finished turns so far, then live
+#                                 delta / turn / end events
+#   GET    /metrics               Prometheus text (see api/timing.py)
+# Every WebSocket client has a bounded queue: when a slow client falls
+# behind, its deltas are dropped (turn / end events evict the oldest
+# queued event instead), so no viewer can stall a debate.
+# Turn events are held in memory only while a debate runs; a finished
+# debate is served from its log on disk, and only the newest
+# max_finished finished sessions are remembered at all.
+#   python frontend/app.py --port 8000 [--config run.json]
+# ────────────────────────────────────────────────
+
+SERVER_CONFIG = {
+    "max_running": 32,     # concurrent debates; more starts get 429
+    "client_queue": 256,   # events buffered per WebSocket client
+    "max_finished": 256,   # finished sessions kept for status / log lookups (oldest evicted)
+}
+
+
+class DebateSession:
+    def __init__(self, topic: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.topic = topic
+        self.status = "running"
+        self.created = time.time()
+        self.output_file = log_file_for(f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{self.id}")
+        self.turns: List[Dict] = []  # turn events, replayed to late subscribers while running
+        self.turn_count = 0
+        self.finished: Optional[float] = None
+        self.metadata: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+        self.subscribers: List[asyncio.Queue] = []
+        self.dropped = 0
+
+    def summary(self) -> Dict:
+        return {
+            "id": self.id,
+            "topic": self.topic,
+            "status": self.status,
+            "created": self.created,
+            "turns": self.turn_count,
+            "subscribers": len(self.subscribers),
+            "dropped_events": self.dropped,
+            "output_file": str(self.output_file),
+            "stop_reason": (self.metadata or {}).get("stop_reason"),
+            "error": self.error,
+        }
+
+    # ── fan-out (called synchronously from inside run_debate) ──
+
+    def publish(self, event: Dict):
+        event = {**event, "debate_id": self.id}
+        if event["type"] == "turn":
+            self.turns.append(event)
+            self.turn_count += 1
+        for queue in self.subscribers:
+            if not queue.full():
+                queue.put_nowait(event)
+            elif event["type"] == "delta":
+                self.dropped += 1
+            else:
+                queue.get_nowait()  # make room for a turn / end event
+                queue.put_nowait(event)
+                self.dropped += 1
+
+    def subscribe(self) -> Tuple[asyncio.Queue, List[Dict]]:
+        """
+        New client queue + snapshot of finished turns (taken atomically, no await between).
+        After the end event the snapshot is empty - read the turns with finished_turns().
+        """
+        queue = asyncio.Queue(maxsize=SERVER_CONFIG["client_queue"])
+        if self.status == "running":
+            self.subscribers.append(queue)
+        else:
+            queue.put_nowait(self._end_event())
+        return queue, list(self.turns)
+
+    async def finished_turns(self) -> List[Dict]:
+        """Turn events of a finished debate, from its log on disk"""
+        try:
+            log = await asyncio.to_thread(load_debate_log, self.output_file)
+        except (OSError, ValueError):
+            return []
+        return [{"type": "turn", **turn, "debate_id": self.id} for turn in log["turns"]]
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self.subscribers:
+            self.subscribers.remove(queue)
+
+    def _end_event(self) -> Dict:
+        return {"type": "end", "debate_id": self.id, "status": self.status,
+                "metadata": self.metadata, "error": self.error}
+
+    async def run(self):
+        try:
+            log = await run_debate(
+                topic=self.topic,
+                output_file=self.output_file,
+                solution_file=self.output_file.with_suffix(".solution.txt"),
+                verbose=False,
+                close_pools=False,
+                on_event=self.publish
+            )
+            self.metadata = log["metadata"]
+            self.status = "failed" if "error" in log["metadata"] else "completed"
+            self.error = log["metadata"].get("error")
+        except asyncio.CancelledError:
+            # run_debate wrote the footer (stop_reason "cancelled") before re-raising
+            try:
+                log = await asyncio.to_thread(load_debate_log, self.output_file)
+                self.metadata = log["metadata"]
+            except (OSError, ValueError):
+                pass
+            self.status = "cancelled"
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+        finally:
+            self.finished = time.time()
+            self.publish(self._end_event())
+            self.subscribers.clear()
+            self.turns = []  # the log on disk has them now
+
+
+class DebateHub:
+    def __init__(self):
+        self.debates: Dict[str, DebateSession] = {}
+
+    def running(self) -> List[DebateSession]:
+        return [s for s in self.debates.values() if s.status == "running"]
+
+    def start(self, topic: str) -> DebateSession:
+        if len(self.running()) >= SERVER_CONFIG["max_running"]:
+            raise HTTPException(429, f"{SERVER_CONFIG['max_running']} debates already running")
+        self.evict_finished()
+        session = DebateSession(topic)
+        self.debates[session.id] = session
+        session.task = asyncio.create_task(session.run())
+        return session
+
+    def evict_finished(self):
+        """Forget the oldest finished sessions beyond max_finished (their logs stay on disk)"""
+        finished = sorted((s for s in self.debates.values() if s.finished is not None),
+                          key=lambda s: s.finished)
+        for session in finished[:max(0, len(finished) - SERVER_CONFIG["max_finished"])]:
+            del self.debates[session.id]
+
+    def get(self, debate_id: str) -> DebateSession:
+        if debate_id not in self.debates:
+            raise HTTPException(404, f"No debate {debate_id}")
+        return self.debates[debate_id]
+
+    async def shutdown(self):
+        tasks = [s.task for s in self.running() if s.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await close_sessions()
+
+
+hub = DebateHub()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    CONFIG["output_dir"].mkdir(parents=True, exist_ok=True)
+    yield
+    await hub.shutdown()
+
+
+app = FastAPI(title="Mirror Max", lifespan=lifespan)
+
+
+class StartRequest(BaseModel):
+    topic: Optional[str] = None
+
+
+@app.post("/debates", status_code=201)
+async def start_debate(request: StartRequest):
+    return hub.start(request.topic or CONFIG["topic"]).summary()
+
+
+@app.get("/debates")
+async def list_debates():
+    return [session.summary() for session in hub.debates.values()]
+
+
+@app.get("/debates/{debate_id}")
+async def get_debate(debate_id: str):
+    session = hub.get(debate_id)
+    return {**session.summary(), "metadata": session.metadata}
+
+
+@app.get("/debates/{debate_id}/log")
+async def get_debate_log(debate_id: str):
+    session = hub.get(debate_id)
+    if not session.output_file.exists():
+        raise HTTPException(404, "No log written yet")
+    return await asyncio.to_thread(load_debate_log, session.output_file)
+
+
+@app.delete("/debates/{debate_id}")
+async def cancel_debate(debate_id: str):
+    session = hub.get(debate_id)
+    if session.status == "running" and session.task:
+        session.task.cancel()
+        await asyncio.gather(session.task, return_exceptions=True)
+    return session.summary()
+
+
+@app.websocket("/debates/{debate_id}/ws")
+async def debate_events(websocket: WebSocket, debate_id: str):
+    session = hub.debates.get(debate_id)
+    if session is None:
+        await websocket.close(code=4404)
+        return
+    await websocket.accept()
+    queue, snapshot = session.subscribe()
+    try:
+        if session.finished is not None:
+            snapshot = await session.finished_turns()
+        for event in snapshot:
+            await websocket.send_json(event)
+        while True:
+            event = await queue.get()
+            await websocket.send_json(event)
+            if event["type"] == "end":
+                break
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        session.unsubscribe(queue)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "running": len(hub.running()), "debates": len(hub.debates)}
+
+
+def main():
+    import uvicorn  # uses uvloop automatically when installed
+
+    parser = argparse.ArgumentParser(description="Mirror Max debate server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--config", type=Path, help="JSON/YAML file merged into CONFIG")
+    parser.add_argument("--max-running", type=int, default=SERVER_CONFIG["max_running"])
+    args = parser.parse_args()
+
+    if args.config:
+        load_config_file(args.config)
+    SERVER_CONFIG["max_running"] = args.max_running
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()